@@ -0,0 +1,52 @@
+"""
+Benchmark for OCRProcessor.preprocess_voter: per-stage ms/card of every preset in
+ocr.voterid_ocr.PREPROCESS_PRESETS, plus the size of the image handed to tesseract.
+With --ocr the tesseract calls are timed too, per language (needs tesseract with
+the eng and hin models); --lang-mode picks routed or dual OCR.
+
+    python benchmarks/bench_card_preprocess.py [image ...] [--presets legacy balanced] [--ocr] [--lang-mode dual]
+"""
+import argparse
+import glob
+import os
+import sys
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr.voterid_ocr import OCRProcessor, PREPROCESS_PRESETS, CARD_LANG_MODE  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--presets", nargs="*", default=list(PREPROCESS_PRESETS))
+    parser.add_argument("--ocr", action="store_true", help="also run tesseract on the result")
+    parser.add_argument("--lang-mode", default=CARD_LANG_MODE, choices=["routed", "dual"])
+    args = parser.parse_args()
+
+    paths = args.images or sorted(glob.glob("uploads/*.png") + glob.glob("uploads/*.jp*g"))
+    images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+    if not images:
+        sys.exit("no card images found")
+
+    print(f"{len(images)} cards")
+    for preset in args.presets:
+        processor = OCRProcessor(preset=preset, lang_mode=args.lang_mode)
+        pixels = 0
+        for img in images:
+            if args.ocr:
+                processor.get_image_text(img)
+            else:
+                pixels += processor.preprocess_voter(img).size
+        timings = processor.stage_timings()
+        stages = "  ".join(f"{stage} {ms:.1f}" for stage, ms in timings.items())
+        size = "" if args.ocr else f"  ({pixels / len(images) / 1e6:.2f} MP/card out)"
+        print(f"{preset:>9}: {sum(timings.values()):7.1f} ms/card  [{stages}]{size}")
+        if args.ocr:
+            print(f"{'':>11}{processor.hindi_passes}/{len(images)} cards needed a Hindi pass")
+
+
+if __name__ == "__main__":
+    main()
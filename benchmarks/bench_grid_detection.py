@@ -0,0 +1,68 @@
+"""
+Benchmark for ocr.voter_ocr.extract_voter_boxes: full-resolution colour detection
+(the default) against the fast mode (grayscale raster, grid found at half scale).
+
+Reports ms/page for each and checks every fast box lies within --tolerance
+pixels of a full-mode box, with the same box count per page.
+
+    python benchmarks/bench_grid_detection.py [pdf ...] [--tolerance 8]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr.voter_ocr import extract_voter_boxes, iter_pdf_pages  # noqa: E402
+
+
+def max_deviation(reference, boxes):
+    """Largest corner/size offset between each reference box and its nearest match."""
+    worst = 0
+    for ref in reference:
+        worst = max(worst, min(max(abs(a - b) for a, b in zip(ref, box)) for box in boxes))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.5)
+    parser.add_argument("--tolerance", type=int, default=8, help="max allowed offset in pixels")
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(glob.glob("uploads/*.pdf"))
+    full_ms = fast_ms = 0.0
+    pages = failures = 0
+    for pdf in pdfs:
+        colour = dict(iter_pdf_pages(pdf, dpi=args.dpi))
+        gray = dict(iter_pdf_pages(pdf, dpi=args.dpi, grayscale=True))
+        for pg_no, page in colour.items():
+            started = time.perf_counter()
+            reference, _ = extract_voter_boxes(page)
+            full_ms += (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            boxes, _ = extract_voter_boxes(gray[pg_no], scale=args.scale)
+            fast_ms += (time.perf_counter() - started) * 1000
+
+            pages += 1
+            if len(boxes) != len(reference) or (reference and max_deviation(reference, boxes) > args.tolerance):
+                failures += 1
+                print(f"{pdf} page {pg_no}: {len(reference)} vs {len(boxes)} boxes, "
+                      f"max offset {max_deviation(reference, boxes) if reference and boxes else '-'}px")
+
+    if not pages:
+        print("no pages found")
+        return 1
+    print(f"{pages} pages, {failures} outside tolerance ({args.tolerance}px)")
+    print(f"full: {full_ms / pages:.1f} ms/page")
+    print(f"fast: {fast_ms / pages:.1f} ms/page  ({full_ms / fast_ms:.1f}x)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Check and benchmark for ocr.page_classifier.classify_page.
+
+Runs the classifier on synthetic pages with a known answer (a full roll page, a
+last page holding a single voter box, a cover page, a blank page), drawn at 200
+DPI and shrunk to the thumbnail DPI the job uses. Then reports the label and
+ms/page for every page of the given PDFs (uploads/*.pdf by default).
+
+    python benchmarks/bench_page_classifier.py [pdf ...] [--dpi 40]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr.page_classifier import classify_page  # noqa: E402
+from ocr.voter_ocr import iter_pdf_pages  # noqa: E402
+
+# A4 at 200 DPI
+PAGE_SIZE = (2339, 1654)
+
+
+def synthetic_page(boxes=0, header=True, cover_lines=0):
+    """Roll page with `boxes` voter boxes (3 per row), optional header/footer and cover text."""
+    img = np.full(PAGE_SIZE, 255, np.uint8)
+    if header:
+        cv2.putText(img, "ELECTORAL ROLL - PART 12", (200, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+        cv2.putText(img, "Page 31", (750, 2280), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    for i in range(boxes):
+        x, y = 90 + (i % 3) * 500, 150 + (i // 3) * 205
+        cv2.rectangle(img, (x, y), (x + 480, y + 190), 0, 2)
+        cv2.putText(img, f"Name : VOTER {i}", (x + 15, y + 50), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+        cv2.putText(img, "Age : 40 Gender : Male", (x + 15, y + 120), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+    for i in range(cover_lines):
+        cv2.putText(img, "SUMMARY OF ELECTORS BY POLLING STATION AND SECTION", (120, 300 + i * 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+    return img
+
+
+# name -> (page, labels that are correct for it)
+CASES = {
+    "full roll page": (synthetic_page(boxes=30), {"voter"}),
+    "one-box last page": (synthetic_page(boxes=1), {"voter"}),
+    "cover page": (synthetic_page(cover_lines=25), {"no_grid"}),
+    "blank page": (synthetic_page(header=False), {"blank"}),
+}
+
+
+def thumbnail(page, dpi):
+    h, w = page.shape
+    return cv2.resize(page, (w * dpi // 200, h * dpi // 200), interpolation=cv2.INTER_AREA)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--dpi", type=int, default=40)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, (page, expected) in CASES.items():
+        label = classify_page(thumbnail(page, args.dpi), dpi=args.dpi)
+        ok = label in expected
+        failures += not ok
+        print(f"{name:>18}: {label}{'' if ok else '  WRONG, expected ' + '/'.join(sorted(expected))}")
+
+    labels = Counter()
+    elapsed = 0.0
+    for pdf in args.pdfs or sorted(glob.glob("uploads/*.pdf")):
+        for pg_no, thumb in iter_pdf_pages(pdf, dpi=args.dpi, grayscale=True):
+            started = time.perf_counter()
+            label = classify_page(thumb, dpi=args.dpi)
+            elapsed += time.perf_counter() - started
+            labels[label] += 1
+            if label != "voter":
+                print(f"{pdf} page {pg_no}: {label}")
+    pages = sum(labels.values())
+    if pages:
+        print(f"{pages} pages: {dict(labels)}, {elapsed / pages * 1000:.1f} ms/page (classification only)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
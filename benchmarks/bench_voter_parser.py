@@ -0,0 +1,176 @@
+"""
+Micro-benchmark and equivalence check for parsers.voterP.parse_voter_text and
+parse_voter_batch.
+
+Compares the compiled extractor against the original helper-by-helper path, and
+the batch parser (and extract_epic_batch) against the compiled row path, on a
+golden corpus: the built-in samples below plus, with --raw, the left-box texts
+stored in uploads/*.raw.jsonl.gz sidecars.
+
+    python benchmarks/bench_voter_parser.py [--raw] [--repeat 200]
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.voterP import (  # noqa: E402
+    GUARDIAN_TAGS, STOP_KEYS, normalize_text, parse_voter_text, parse_voter_batch,
+    extract_epic, extract_epic_batch,
+)
+
+SAMPLES = [
+    "Name : RAMESH KUMAR\nFathers Name: SURESH KUMAR\nHouse Number : 12-3/A\nAge : 45 Gender : Male\nPhoto Available",
+    "Name = LAKSHMI DEVI\nHusbands Name: VENKAT RAO\nHouse No. : 4-56\nAge 38 Gender : FEMALE",
+    "Name : | ANITHA\nMothers Name: SAROJA\nH.No: 7\nAqe: 22 Gender : Fernale\nPhoto\nAvailable",
+    "Name: MOHAMMED ALI\nOthers Name: ABDUL\nHouse Number : NA\nAgc : 61 Gender : MATE",
+    "Name : > SITA\nFather Name : - RAMA\nHOUSE NUMBER :\nAge : 19 Gender : FEMAIE",
+    "Name : KIRAN\nHusband : PRAKASH NAME GOPAL\nHouse No : 1-1-1 Age : 30 Gender: Male",
+    "NAME: !RAVI Fathers Name ; SRINU House Number ? 9/11 Age ? 52 Gender + Male",
+    "Nome : GARBLED\nFothers Nane : NOISE\nHouse Number : 3\nAge : abc Gender : ?",
+    "",
+    "Photo Available",
+    # Tesseract emits ligatures and ß; str.upper expands them (ﬁ -> FI, ß -> SS)
+    "Name : ﬁROZ KHAN\nFathers Name: HAﬁZ\nHouse No : 2 Aqe ﬁ | ! XYZ12345678 Gender : Male",
+    "Name : GROß\nHusbands Name: STRAßE\nHouse Number : ﬂat 3\nAge : 40 Gender : FEMALE",
+    "Name : ﬀ RAJ ﬁ\nOthers Name: ß\nH.No: ﬁ7 Age : 27 Gender : Male ABC1234567",
+]
+
+
+# ----------------------------------------------------------------------------
+# Frozen reference: the per-field helpers parsers.voterP used before
+# VoterFieldExtractor. Kept here unchanged so the compiled rules have something
+# to be compared against; fixes go into VoterFieldExtractor, not here.
+# ----------------------------------------------------------------------------
+def extract_between(text, start_keys, stop_keys):
+    start = r"(?:%s)\s*[:\-]?\s*" % "|".join(start_keys)
+    stop = r"(?=\b(?:%s)\b)" % "|".join(stop_keys)
+    m = re.search(start + r"(.*?)" + stop, text, re.IGNORECASE)
+    if not m:
+        return "Not Stated"
+    value = m.group(1)
+    value = re.sub(r"^[^\w\s]+", "", value)
+    value = value.strip(" :-")
+    value = re.sub(r"\b(NAME|FATHER|HUSBAND)\b.*$", "", value)
+    return value.strip() if value else "Not Stated"
+
+
+def extract_name_and_guardian(text):
+    name = extract_between(
+        text,
+        start_keys=["NAME"],
+        stop_keys=list(GUARDIAN_TAGS["FATHER"] + GUARDIAN_TAGS["HUSBAND"] +
+                       GUARDIAN_TAGS["MOTHER"] + GUARDIAN_TAGS["OTHER"] + STOP_KEYS)
+    )
+    guardian = "Not Stated"
+    guardian_type = "Not Stated"
+    for g_type, patterns in GUARDIAN_TAGS.items():
+        pattern_regex = r"\b(?:%s)\b" % "|".join(patterns)
+        if re.search(pattern_regex, text):
+            guardian = extract_between(text, start_keys=patterns, stop_keys=STOP_KEYS)
+            guardian_type = g_type
+            break
+    return name, guardian, guardian_type
+
+
+def extract_age(text):
+    match = re.search(r'(?:Age|Aqe|Agc)\s*[:\-\s]*(\d+)', text, re.IGNORECASE)
+    if match:
+        return match.group(1)
+    return "Not Stated"
+
+
+def extract_gender(text):
+    if re.search(r"\b(MALE|MAIA|MATE)\b", text):
+        return "Male"
+    if re.search(r"\b(FEMALE|FERNALE|FEMAIE|FAMATE)\b", text):
+        return "Female"
+    return "Not Stated"
+
+
+def extract_house_no(text):
+    if not text: return "Not Stated"
+    patterns = [
+        r"HOUSE\s*NO\.?\s*[:\-]?\s*(.+)",
+        r"HOUSE\s*NUMBER\s*[:\-]?\s*(.+)",
+        r"H\.?\s*NO\.?\s*[:\-]?\s*(.+)",
+    ]
+    for p in patterns:
+        m = re.search(p, text, re.IGNORECASE)
+        if m:
+            value = m.group(1).strip()
+            value = re.split(r"\b(AGE|GENDER|PHOTO|AVAILABLE|NAME|FATHER|HUSBAND)\b",
+                             value, flags=re.IGNORECASE)[0].strip()
+            value = re.sub(r"^[^\w]+|[^\w]+$", "", value)
+            return value if value else "Not Stated"
+    return "Not Stated"
+
+
+def reference_parse(text):
+    """The original composition of the per-field helpers."""
+    text = normalize_text(text)
+    name, guardian, g_type = extract_name_and_guardian(text)
+    return {
+        "Name": name,
+        "Father/Husband": guardian,
+        "Guardian Type": g_type,
+        "House No": extract_house_no(text),
+        "Age": extract_age(text),
+        "Gender": extract_gender(text),
+        "EPIC No": "Not Stated",
+    }
+
+
+def load_raw_corpus(pattern="uploads/*.raw.jsonl.gz"):
+    texts = []
+    for path in glob.glob(pattern):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            texts.extend(json.loads(line).get("left", "") for line in f)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw", action="store_true", help="add stored raw OCR text to the corpus")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = SAMPLES + (load_raw_corpus() if args.raw else [])
+    mismatches = [t for t in corpus if reference_parse(t) != parse_voter_text(t)]
+    for t in mismatches[:5]:
+        print("MISMATCH:", repr(t))
+        print("  reference:", reference_parse(t))
+        print("  compiled: ", parse_voter_text(t))
+
+    rows = pd.DataFrame([parse_voter_text(t) for t in corpus])
+    batch_ok = parse_voter_batch(corpus).to_dict("records") == rows.to_dict("records")
+    epic_ok = extract_epic_batch(corpus).tolist() == [extract_epic(t) for t in corpus]
+    if not batch_ok:
+        print("MISMATCH: parse_voter_batch differs from parse_voter_text")
+    if not epic_ok:
+        print("MISMATCH: extract_epic_batch differs from extract_epic")
+
+    n = len(corpus) * args.repeat
+    # Each variant ends in a DataFrame, as the job pipeline does
+    big = corpus * args.repeat
+    ref = timeit.timeit(lambda: pd.DataFrame([reference_parse(t) for t in big]), number=1)
+    new = timeit.timeit(lambda: pd.DataFrame([parse_voter_text(t) for t in big]), number=1)
+    vec = timeit.timeit(lambda: parse_voter_batch(big), number=1)
+    print(f"corpus: {len(corpus)} texts, {len(mismatches)} mismatches, "
+          f"batch {'ok' if batch_ok else 'MISMATCH'}, epic batch {'ok' if epic_ok else 'MISMATCH'}")
+    print(f"reference: {ref / n * 1e6:.1f} us/box")
+    print(f"compiled:  {new / n * 1e6:.1f} us/box  ({ref / new:.2f}x)")
+    print(f"batch:     {vec / n * 1e6:.1f} us/box  ({ref / vec:.2f}x)")
+    return 1 if mismatches or not batch_ok or not epic_ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,67 @@
 import os
-import mysql.connector
+import threading
+import time
+from contextlib import contextmanager
+
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+# mysql.connector caps a pool at 32 connections
+POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", 5)), 32)
+# Seconds a request waits for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # Built on first use so importing db.py never needs the MYSQL* variables
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="voter_ocr",
+                    pool_size=POOL_SIZE,
+                    pool_reset_session=True,
+                    host=os.getenv("MYSQLHOST"),
+                    user=os.getenv("MYSQLUSER"),
+                    password=os.getenv("MYSQLPASSWORD"),
+                    database=os.getenv("MYSQLDATABASE"),
+                    port=int(os.getenv("MYSQLPORT", 3306)),
+                    autocommit=True
+                )
+    return _pool
+
 
 def get_db():
-    return mysql.connector.connect(
-        host=os.getenv("MYSQLHOST"),
-        user=os.getenv("MYSQLUSER"),
-        password=os.getenv("MYSQLPASSWORD"),
-        database=os.getenv("MYSQLDATABASE"),
-        port=int(os.getenv("MYSQLPORT", 3306)),
-        autocommit=True
-    )
+    """
+    Checks a connection out of the pool, waiting up to POOL_TIMEOUT for one to free up.
+    conn.close() hands it back. get_connection itself checks is_connected() and
+    reconnects connections the server dropped (wait_timeout), returning them to the
+    pool if that fails, so no extra ping here that could leak the slot.
+    """
+    deadline = time.monotonic() + POOL_TIMEOUT
+    while True:
+        try:
+            conn = _get_pool().get_connection()
+            break
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+    return conn
+
+
+@contextmanager
+def db_connection():
+    """with db_connection() as conn: ... -- the connection goes back to the pool on exit."""
+    conn = get_db()
+    try:
+        yield conn
+    finally:
+        conn.close()
 
 
 
@@ -0,0 +1,150 @@
+import math
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import xlsxwriter
+except ImportError:  # optional, falls back to openpyxl's write-only mode
+    xlsxwriter = None
+    from openpyxl import Workbook
+
+from results import results_path, ensure_parquet
+
+# Download formats and their media types; xlsx and parquet are written by the job, csv on first request
+FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class XlsxSink:
+    """Streams rows into a workbook: xlsxwriter constant_memory, or openpyxl write-only."""
+
+    def __init__(self, path):
+        self.path = path
+        if xlsxwriter is not None:
+            self._book = xlsxwriter.Workbook(path, {"constant_memory": True})
+            self._sheet = self._book.add_worksheet("Sheet1")
+        else:
+            self._book = Workbook(write_only=True)
+            self._sheet = self._book.create_sheet("Sheet1")
+        self._row = 0
+
+    def _write_row(self, values):
+        if xlsxwriter is not None:
+            self._sheet.write_row(self._row, 0, values)
+        else:
+            self._sheet.append(values)
+        self._row += 1
+
+    def write(self, columns, rows):
+        if self._row == 0:
+            self._write_row(columns)
+        for row in rows:
+            self._write_row(row)
+
+    def close(self, columns):
+        if xlsxwriter is not None:
+            self._book.close()
+        else:
+            self._book.save(self.path)
+
+
+class ParquetSink:
+    """Each batch becomes a row group of string columns (same schema as results.save_frame)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, columns, rows):
+        table = pa.table({
+            column: pa.array(["" if row[i] is None else str(row[i]) for row in rows], type=pa.string())
+            for i, column in enumerate(columns)
+        })
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self, columns):
+        if self._writer is None:
+            # No rows at all: still leave a readable, empty file
+            pq.write_table(pa.table({c: pa.array([], type=pa.string()) for c in columns}), self.path)
+        else:
+            self._writer.close()
+
+
+def _cell(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+class ResultWriter:
+    """
+    Export stage of a job. Records are appended as pages finish and streamed to
+    every sink (workbook and its Parquet copy), so the full result is never held.
+    Sinks write under temporary names and are renamed on close, since the old
+    workbook may be hard-linked into the result cache. Columns are fixed by the
+    first batch; the parsers always return the same keys.
+    """
+
+    def __init__(self, output_path, sinks=(("xlsx", XlsxSink), ("parquet", ParquetSink))):
+        self.output_path = output_path
+        self.columns = None
+        self.count = 0
+        self._sinks = []
+        for fmt, sink in sinks:
+            final = output_path if fmt == "xlsx" else results_path(output_path)
+            tmp = final[:-len(f".{fmt}")] + f".tmp.{fmt}"
+            self._sinks.append((sink(tmp), tmp, final))
+
+    def append(self, records):
+        """records: list of dicts or a DataFrame."""
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict(orient="records")
+        if not records:
+            return
+        if self.columns is None:
+            self.columns = list(records[0])
+        rows = [[_cell(record.get(column)) for column in self.columns] for record in records]
+        for sink, _, _ in self._sinks:
+            sink.write(self.columns, rows)
+        self.count += len(rows)
+
+    def close(self):
+        """Finalizes every sink and returns the number of records written."""
+        for sink, tmp, final in self._sinks:
+            sink.close(self.columns or [])
+            os.replace(tmp, final)
+        return self.count
+
+    def abort(self):
+        """Drops the partial output of a failed job; the previous result stays in place."""
+        for sink, tmp, _ in self._sinks:
+            try:
+                sink.close(self.columns or [])
+            except Exception:
+                pass  # already failing; the original error is what gets reported
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def export_path(xlsx_path, fmt):
+    """
+    Path of the result in the given format. CSV is built from the Parquet copy on
+    first request and kept next to the workbook for later downloads.
+    """
+    if fmt == "xlsx":
+        return xlsx_path
+    parquet_path = ensure_parquet(xlsx_path)
+    if fmt == "parquet":
+        return parquet_path
+    path = xlsx_path[:-len(".xlsx")] + f".{fmt}"
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(parquet_path):
+        tmp_path = path + ".tmp"
+        pd.read_parquet(parquet_path).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return path
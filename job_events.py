@@ -0,0 +1,70 @@
+"""
+Job change notifications for the web process. Workers may run in other
+processes, so changes are read back from the job store: one background task
+asks for the version of every job somebody is waiting on, one query per tick
+however many tabs are open, and wakes only the waiters whose job changed.
+"""
+import asyncio
+import os
+from collections import defaultdict
+
+from starlette.concurrency import run_in_threadpool
+
+from jobs import job_store
+
+EVENTS_POLL_SECONDS = float(os.getenv("JOB_EVENTS_POLL_SECONDS", 0.5))
+
+
+class JobEvents:
+    def __init__(self, store=job_store, interval=EVENTS_POLL_SECONDS):
+        self.store = store
+        self.interval = interval
+        # file_id -> [(version the waiter has seen, future)]
+        self._waiters = defaultdict(list)
+        self._task = None
+
+    async def wait(self, file_id, version, timeout):
+        """
+        The job once its version differs from `version`, or the unchanged job after
+        `timeout` seconds. None when the job does not exist (or was removed meanwhile).
+        """
+        job = await run_in_threadpool(self.store.get, file_id)
+        if job is None or job["version"] != version:
+            return job
+        future = asyncio.get_running_loop().create_future()
+        waiter = (version, future)
+        self._waiters[file_id].append(waiter)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return job
+        finally:
+            waiters = self._waiters.get(file_id)
+            if waiters is not None:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[file_id]
+
+    async def _watch(self):
+        # Stops when nobody is waiting; the next wait() starts it again
+        while self._waiters:
+            await asyncio.sleep(self.interval)
+            try:
+                versions = await run_in_threadpool(self.store.versions, list(self._waiters))
+            except Exception:
+                continue  # database busy or briefly unavailable; waiters time out on their own
+            for file_id, waiters in list(self._waiters.items()):
+                current = versions.get(file_id)
+                changed = [(v, f) for v, f in waiters if v != current and not f.done()]
+                if not changed:
+                    continue
+                job = await run_in_threadpool(self.store.get, file_id) if current is not None else None
+                for _, future in changed:
+                    if not future.done():
+                        future.set_result(job)
+
+
+job_events = JobEvents()
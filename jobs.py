@@ -0,0 +1,271 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# SQLite file shared by the web process and every worker process on the host
+JOBS_DB = os.getenv("JOBS_DB", os.path.join("uploads", "jobs.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    file_id      TEXT PRIMARY KEY,
+    filename     TEXT,
+    file_path    TEXT,
+    doc_type     TEXT,
+    state        TEXT NOT NULL DEFAULT 'queued',
+    status       TEXT NOT NULL DEFAULT 'Processing',
+    file         TEXT,
+    count        INTEGER NOT NULL DEFAULT 0,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    worker       TEXT,
+    created_at   TEXT NOT NULL,
+    heartbeat_at TEXT,
+    timestamp    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, created_at);
+"""
+
+# Columns added after the first release; created on old databases at startup
+MIGRATIONS = {
+    "cache_key": "TEXT",
+    # 'ocr' runs the full pipeline, 'reparse' rebuilds records from a raw-text sidecar
+    "job_type": "TEXT NOT NULL DEFAULT 'ocr'",
+    # Page metrics of voter-list jobs; skipped pages never reach the full render or OCR
+    "pages_total": "INTEGER NOT NULL DEFAULT 0",
+    "pages_skipped_blank": "INTEGER NOT NULL DEFAULT 0",
+    "pages_skipped_no_grid": "INTEGER NOT NULL DEFAULT 0",
+    # Progress of a running voter-list job; a retried job resumes after pages_done
+    "pages_done": "INTEGER NOT NULL DEFAULT 0",
+    "eta_seconds": "INTEGER",
+    # Bumped on every change a watcher cares about (not heartbeats); see job_events
+    "version": "INTEGER NOT NULL DEFAULT 0",
+    # Session user who submitted the job; jobs from before this column have none
+    "owner": "TEXT",
+}
+
+# Per-user listing index and counters, created once the migrated columns exist.
+# The triggers keep job_stats in step with every insert and state/count change,
+# whichever process makes it, so the dashboard never has to scan the jobs.
+STATS_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs (owner, created_at, file_id);
+CREATE TABLE IF NOT EXISTS job_stats (
+    owner     TEXT PRIMARY KEY,
+    total     INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed    INTEGER NOT NULL DEFAULT 0,
+    records   INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS job_stats_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO job_stats (owner, total, completed, failed, records)
+    VALUES (COALESCE(NEW.owner, ''), 1, NEW.state = 'done', NEW.state = 'failed',
+            CASE WHEN NEW.state = 'done' THEN NEW.count ELSE 0 END)
+    ON CONFLICT (owner) DO UPDATE SET
+        total = total + 1,
+        completed = completed + excluded.completed,
+        failed = failed + excluded.failed,
+        records = records + excluded.records;
+END;
+CREATE TRIGGER IF NOT EXISTS job_stats_update AFTER UPDATE OF state, count ON jobs BEGIN
+    UPDATE job_stats SET
+        completed = completed + (NEW.state = 'done') - (OLD.state = 'done'),
+        failed = failed + (NEW.state = 'failed') - (OLD.state = 'failed'),
+        records = records + (CASE WHEN NEW.state = 'done' THEN NEW.count ELSE 0 END)
+                          - (CASE WHEN OLD.state = 'done' THEN OLD.count ELSE 0 END)
+    WHERE owner = COALESCE(NEW.owner, '');
+END;
+"""
+STATS_VERSION = 1
+
+DATETIME_FIELDS = ("created_at", "heartbeat_at", "timestamp")
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def open_db(path):
+    """SQLite connection tuned for several processes sharing one file."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class JobStore:
+    """
+    Durable job table. `state` drives the queue (queued -> running -> done/failed);
+    `status` is the user-facing text the templates already understand.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, ddl in MIGRATIONS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}")
+        conn.executescript(STATS_SCHEMA)
+        self._backfill_stats(conn)
+
+    @staticmethod
+    def _backfill_stats(conn):
+        """Counts the jobs that predate job_stats, once per database."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < STATS_VERSION:
+                conn.execute("DELETE FROM job_stats")
+                conn.execute(
+                    "INSERT INTO job_stats (owner, total, completed, failed, records) "
+                    "SELECT COALESCE(owner, ''), COUNT(*), SUM(state = 'done'), SUM(state = 'failed'), "
+                    "SUM(CASE WHEN state = 'done' THEN count ELSE 0 END) "
+                    "FROM jobs GROUP BY COALESCE(owner, '')"
+                )
+                conn.execute(f"PRAGMA user_version = {STATS_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_db(self.path)
+        return conn
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for key in DATETIME_FIELDS:
+            if job.get(key):
+                job[key] = datetime.fromisoformat(job[key])
+        return job
+
+    def create(self, file_id, filename, file_path, doc_type, cache_key=None, job_type="ocr", owner=None,
+               state="queued", status="Processing", file=None, count=0):
+        """Queues a job; a finished one (a result-cache hit) is inserted as state="done" directly."""
+        now = _now()
+        self._conn().execute(
+            "INSERT INTO jobs (file_id, filename, file_path, doc_type, cache_key, job_type, owner, "
+            "state, status, file, count, created_at, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (file_id, filename, file_path, doc_type, cache_key, job_type, owner,
+             state, status, file, count, now, now if state == "done" else None),
+        )
+
+    def get(self, file_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE file_id = ?", (file_id,)).fetchone()
+        return self._to_dict(row)
+
+    def update(self, file_id, **fields):
+        fields["heartbeat_at"] = _now()
+        for key in DATETIME_FIELDS:
+            if isinstance(fields.get(key), datetime):
+                fields[key] = fields[key].isoformat()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._conn().execute(
+            f"UPDATE jobs SET {assignments}, version = version + 1 WHERE file_id = ?",
+            (*fields.values(), file_id),
+        )
+
+    def heartbeat(self, file_id):
+        self._conn().execute("UPDATE jobs SET heartbeat_at = ? WHERE file_id = ?", (_now(), file_id))
+
+    def claim(self, worker, file_id=None):
+        """Atomically moves the oldest queued job (or a given one) to running."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if file_id is None:
+                row = conn.execute(
+                    "SELECT file_id FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT file_id FROM jobs WHERE state = 'queued' AND file_id = ?", (file_id,)
+                ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1, heartbeat_at = ?, "
+                "version = version + 1 "
+                "WHERE file_id = ?",
+                (worker, _now(), row["file_id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["file_id"])
+
+    def requeue_stale(self, stale_after, max_attempts=3):
+        """Jobs whose worker stopped heart-beating go back to the queue, or fail after max_attempts."""
+        cutoff = (datetime.now() - timedelta(seconds=stale_after)).isoformat()
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET state = 'failed', status = 'Error: worker lost', timestamp = ?, version = version + 1 "
+            "WHERE state = 'running' AND heartbeat_at < ? AND attempts >= ?",
+            (_now(), cutoff, max_attempts),
+        )
+        conn.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, version = version + 1 "
+            "WHERE state = 'running' AND heartbeat_at < ?",
+            (cutoff,),
+        )
+
+    def versions(self, file_ids):
+        """{file_id: version} of the given jobs; missing jobs are left out."""
+        file_ids = list(file_ids)
+        versions = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(file_ids), 500):
+            chunk = file_ids[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT file_id, version FROM jobs WHERE file_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            versions.update((row["file_id"], row["version"]) for row in rows)
+        return versions
+
+    def all(self):
+        """Every job keyed by file_id, oldest first; for maintenance scripts like reparse.py."""
+        rows = self._conn().execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        return {row["file_id"]: self._to_dict(row) for row in rows}
+
+    def page(self, owner, limit, before=None):
+        """
+        One user's jobs newest first, `limit` at a time, read off idx_jobs_owner.
+        `before` is the cursor returned with the previous page; returns
+        (jobs keyed by file_id, cursor of the next page or None).
+        """
+        sql = "SELECT * FROM jobs WHERE owner = ?"
+        params = [owner]
+        if before:
+            created_at, _, file_id = before.partition("|")
+            sql += " AND (created_at < ? OR (created_at = ? AND file_id < ?))"
+            params += [created_at, created_at, file_id]
+        sql += " ORDER BY created_at DESC, file_id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+        cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            cursor = f"{rows[-1]['created_at']}|{rows[-1]['file_id']}"
+        return {row["file_id"]: self._to_dict(row) for row in rows}, cursor
+
+    def recent(self, owner, limit=5):
+        return self.page(owner, limit)[0]
+
+    def stats(self, owner):
+        """Lifetime totals of one user's jobs, kept up to date by the job_stats triggers."""
+        row = self._conn().execute("SELECT * FROM job_stats WHERE owner = ?", (owner,)).fetchone()
+        if row is None:
+            return {"total": 0, "completed": 0, "failed": 0, "records": 0}
+        return {key: row[key] for key in ("total", "completed", "failed", "records")}
+
+
+job_store = JobStore()
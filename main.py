@@ -1,26 +1,75 @@
 import os
 import uuid
-import pandas as pd
-from fastapi import FastAPI, UploadFile, File, Request, BackgroundTasks, Form,  Depends
+from fastapi import FastAPI, UploadFile, File, Request, Form,  Depends, HTTPException
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse, RedirectResponse, HTMLResponse
+from fastapi.responses import FileResponse, RedirectResponse, HTMLResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
-from pdf2image import convert_from_path
 import base64
-# --- Custom OCR & Parser Modules ---
-from ocr.voter_ocr import extract_voter_boxes, split_voter_box, get_ocr_text
-from parsers.voterP import parse_voter_text, extract_epic
-from ocr.voterid_ocr import OCRProcessor
-from parsers.voteridP import VoterParser
+import hashlib
+import json
 from datetime import datetime
+# --- Job queue & result cache ---
+import repository as repo
+from worker import start_embedded_workers
+from result_cache import result_cache, make_key
+from tasks import ocr_config_key, raw_text_path
+from results import query_results
+from job_events import job_events
+from exporters import export_path, FORMATS as EXPORT_FORMATS
+from parsers import PARSER_VERSION
 # --- DB & Security Modules ---
 from security import hash_password, verify_password
-from db import get_db  # Using your db.py with get_db()
 # from workshop import secure_filename
 import itsdangerous
 from starlette.middleware.sessions import SessionMiddleware
 
+# Largest file accepted by /process; the whole request may carry a little more (form fields, multipart framing)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 50)) * 1024 * 1024
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_PATHS = ("/process", "/process/cards")
+UPLOAD_TOO_LARGE = f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)"
+
+
+class UploadSizeLimit:
+    """
+    Bounds upload requests before FastAPI parses them: the multipart parser spools
+    the whole body to a temp file before the route runs, so a check in the route
+    comes too late. Rejects on Content-Length up front, and counts the bytes of
+    chunked bodies as they arrive.
+    """
+
+    def __init__(self, app, max_bytes, paths):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and (not length.isdigit() or int(length) > self.max_bytes):
+            return await JSONResponse({"error": UPLOAD_TOO_LARGE}, status_code=413)(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Surfaces from the form parser as a 413 response
+                    raise HTTPException(status_code=413, detail=UPLOAD_TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
 app = FastAPI()
+app.add_middleware(UploadSizeLimit, max_bytes=MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES, paths=UPLOAD_PATHS)
 
 # Session Middleware is crucial for the login system to remember users
 # app.add_middleware(SessionMiddleware, secret_key="super-secret-key-change-this")
@@ -28,57 +77,26 @@ app.add_middleware(SessionMiddleware, secret_key=os.getenv("railway-test-secret-
 templates = Jinja2Templates(directory="templates")
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Worker threads started inside this process; set to 0 when separate `python worker.py` processes run the queue
+EMBEDDED_WORKERS = int(os.getenv("EMBEDDED_WORKERS", 1))
+# Rows per page on the results table
+RESULTS_PAGE_SIZE = 50
+# Jobs per page on /extracted
+JOBS_PAGE_SIZE = 25
+# Longest a /status long-poll is held, and the comment interval that keeps an idle event stream open
+LONG_POLL_MAX_SECONDS = 30
+SSE_KEEPALIVE_SECONDS = 15
+
+@app.on_event("startup")
+def start_workers():
+    if EMBEDDED_WORKERS > 0:
+        start_embedded_workers(EMBEDDED_WORKERS)
 
-# Shared in-memory dictionary to track job progress
-db_status = {}
 @app.get("/db-test")
-def db_test():
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT 1")
+async def db_test():
+    await repo.ping()
     return {"db": "connected"}
 
-# ============================
-# BACKGROUND OCR TASK
-# ============================
-
-def process_pdf_task(file_id: str, file_path: str, doc_type: str):
-    try:
-        records = []
-        if doc_type == "voter_list":
-            pages = convert_from_path(file_path, dpi=200)
-            for pg_no, page in enumerate(pages, start=1):
-                boxes, img = extract_voter_boxes(page)
-                for x, y, w, h in boxes:
-                    left_img, right_img = split_voter_box(img, x, y, w, h)
-                    data = parse_voter_text(get_ocr_text(left_img))
-                    epic = extract_epic(get_ocr_text(right_img))
-                    data.update({"EPIC No": epic, "Page No": pg_no})
-                    records.append(data)
-        
-        elif doc_type == "voter_id_card":
-            ocr_engine = OCRProcessor()
-            voter_parser = VoterParser()
-            raw_text = ocr_engine.get_text(file_path)
-            data = voter_parser.parse_all(raw_text)
-            records.append(data)
-        
-        # Save results to Excel
-        df = pd.DataFrame(records)
-        output_path = os.path.join(UPLOAD_DIR, f"{file_id}.xlsx")
-        df.to_excel(output_path, index=False)
-        
-        # Update status to Completed for the UI to pick up
-        db_status[file_id].update({
-            "status": "Completed", 
-            "file": output_path, 
-            "count": len(records),
-            "doc_type": doc_type,
-            "timestamp": datetime.now()
-        })
-    except Exception as e:
-        db_status[file_id].update({"status": f"Error: {str(e)}", "file": None, "count": 0, "timestamp": datetime.now()})
-
 # ============================
 # AUTHENTICATION ROUTES
 # ============================
@@ -94,13 +112,8 @@ def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @app.post("/login")
-def login_user(request: Request, email: str = Form(...), password: str = Form(...)):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+async def login_user(request: Request, email: str = Form(...), password: str = Form(...)):
+    user = await repo.get_user(email)
 
     # if not user or not verify_password(password, user['password_hash']):
     #     return templates.TemplateResponse("login.html", {
@@ -108,7 +121,8 @@ def login_user(request: Request, email: str = Form(...), password: str = Form(..
     #     })
     if not user:
         return templates.TemplateResponse("login.html", {"request": request, "error": "User not found"})
-    if not verify_password(password, user["password_hash"]):
+    # argon2 is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, user["password_hash"]):
         return templates.TemplateResponse("login.html", {"request": request, "error": "Wrong password"})
     request.session["user"] = user['email']
     return RedirectResponse("/dashboard", status_code=303)
@@ -118,20 +132,12 @@ def signup_page(request: Request):
     return templates.TemplateResponse("signup.html", {"request": request})
 
 @app.post("/signup")
-def signup_user(request: Request, full_name: str = Form(...), email: str = Form(...), password: str = Form(...)):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT email FROM users WHERE email = %s", (email,))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
+async def signup_user(request: Request, full_name: str = Form(...), email: str = Form(...), password: str = Form(...)):
+    if await repo.email_exists(email):
         return templates.TemplateResponse("signup.html", {"request": request, "error": "Email already exists"})
 
-    hashed = hash_password(password)
-    cursor.execute("INSERT INTO users (full_name, email, password_hash) VALUES (%s, %s, %s)", (full_name, email, hashed))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    hashed = await run_in_threadpool(hash_password, password)
+    await repo.create_user(full_name, email, hashed)
 
     request.session["user"] = email
     return RedirectResponse("/dashboard", status_code=302)
@@ -181,28 +187,17 @@ async def dashboard(request: Request):
     if not user:
         return RedirectResponse("/login", status_code=303)
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT full_name, avatar_url FROM users WHERE email = %s",
-        (user,)
-    )
-    user_data = cursor.fetchone()
-    cursor.close()
-    conn.close()
-
-    sorted_jobs = sorted(
-        db_status.items(),
-        key=lambda x: x[1].get("timestamp", datetime.min),
-        reverse=True
-    )[:5]
-    recent_jobs = dict(sorted_jobs)
+    user_data = await repo.get_user_card(user)
+    recent_jobs = await repo.recent_jobs(user, 5)
+    # Lifetime KPIs come from the counters, not from scanning the job history
+    stats = await repo.job_stats(user)
 
     return templates.TemplateResponse(
         "dashboard.html",
         {
             "request": request,
             "jobs": recent_jobs,
+            "stats": stats,
             "user": user_data or {"full_name": user, "avatar_url": None},
         }
     )
@@ -218,12 +213,7 @@ async def upload_page(request: Request):
         return RedirectResponse("/login")
 
     # 1. Fetch user data so the Profile Chip in the top bar works
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT full_name, avatar_url FROM users WHERE email = %s", (user_email,))
-    user_data = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    user_data = await repo.get_user_card(user_email)
 
     # 2. Pass the 'user' variable to the template
     return templates.TemplateResponse("upload.html", {
@@ -234,71 +224,192 @@ async def upload_page(request: Request):
 # ============================
 # Process
 # ============================
+async def save_upload(file: UploadFile, dest_path: str):
+    """
+    Copies the spooled upload to dest_path one chunk at a time, hashing as it goes,
+    and fsyncs before returning the sha256 hex digest. Disk writes run off the event loop.
+    The request size is already bounded by UploadSizeLimit.
+    """
+    digest = hashlib.sha256()
+    f = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+        await run_in_threadpool(f.flush)
+        await run_in_threadpool(os.fsync, f.fileno())
+    except BaseException:
+        f.close()
+        os.remove(dest_path)
+        raise
+    f.close()
+    return digest.hexdigest()
+
 @app.post("/process")
-async def process_pdf(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...), doc_type: str = Form(...)):
+async def process_pdf(request: Request, file: UploadFile = File(...), doc_type: str = Form(...)):
     if not request.session.get("user"):
         return RedirectResponse("/login")
+
+    # The request limit leaves room for multipart framing; this is the exact limit on the file
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        return JSONResponse({"error": UPLOAD_TOO_LARGE}, status_code=413)
         
     file_id = str(uuid.uuid4())
     original_filename = file.filename
     ext = file.filename.split('.')[-1]
     file_path = os.path.join(UPLOAD_DIR, f"{file_id}.{ext}")
     
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    # Written under a temporary name so a half-copied upload is never picked up
+    part_path = file_path + ".part"
+    sha256 = await save_upload(file, part_path)
+    cache_key = make_key(sha256, doc_type, ocr_config_key(), PARSER_VERSION)
+    output_path = os.path.join(UPLOAD_DIR, f"{file_id}.xlsx")
+    cached_count = await run_in_threadpool(
+        result_cache.lookup, cache_key, output_path, raw_text_path(file_id, UPLOAD_DIR)
+    )
+    if cached_count is not None:
+        # Same roll seen before with the same OCR/parser setup: reuse its workbook, skip OCR.
+        # Inserted already done, so no worker can ever claim it
+        os.remove(part_path)
+        await repo.create_job(file_id, original_filename, None, doc_type, cache_key,
+                              owner=request.session["user"], state="done", status="Completed",
+                              file=output_path, count=cached_count)
+        return templates.TemplateResponse("view.html", {"request": request, "file_id": file_id})
+
+    os.replace(part_path, file_path)
     
-    db_status[file_id] = {"status": "Processing", "file": None, "count": 0,"filename": original_filename}
-    background_tasks.add_task(process_pdf_task, file_id, file_path, doc_type)
+    # Queued in the durable store; whichever worker claims it first runs it
+    await repo.create_job(file_id, original_filename, file_path, doc_type, cache_key,
+                          owner=request.session["user"])
     
     return templates.TemplateResponse("view.html", {"request": request, "file_id": file_id})
 
+@app.post("/process/cards")
+async def process_cards(request: Request, file: UploadFile = File(...)):
+    """Batch of voter ID cards in one ZIP or multi-page PDF; one row per card in the workbook."""
+    return await process_pdf(request, file, "voter_id_batch")
+
+async def owned_job(request: Request, file_id: str):
+    """The job if it belongs to the signed-in user; None for a missing job or somebody else's."""
+    job = await repo.get_job(file_id)
+    if job is None or job.get("owner") is None or job["owner"] != request.session.get("user"):
+        return None
+    return job
+
+@app.post("/reparse/{file_id}")
+async def reparse_job(request: Request, file_id: str):
+    """Queues a new job that rebuilds records from the stored OCR text, without OCR."""
+    if not request.session.get("user"):
+        return RedirectResponse("/login")
+
+    source = await owned_job(request, file_id)
+    raw_path = raw_text_path(file_id, UPLOAD_DIR)
+    if not source or not os.path.exists(raw_path):
+        return JSONResponse({"error": "No stored OCR text for this job"}, status_code=404)
+
+    new_id = str(uuid.uuid4())
+    await repo.create_job(new_id, source["filename"], raw_path, source["doc_type"], job_type="reparse",
+                          owner=request.session["user"])
+    return templates.TemplateResponse("view.html", {"request": request, "file_id": new_id})
+
+def status_payload(job):
+    return {
+        "status": job["status"],
+        "version": job["version"],
+        "pages_done": job["pages_done"],
+        "pages_total": job["pages_total"],
+        "records": job["count"],
+        "eta_seconds": job["eta_seconds"],
+    }
+
+
 @app.get("/status/{file_id}")
-async def get_status(file_id: str):
-    """Used by JS in view.html to poll status"""
-    job = db_status.get(file_id, {"status": "Not Found"})
-    return {"status": job["status"]}
+async def get_status(file_id: str, version: int = None, wait: float = 0):
+    """
+    Status and page progress of a job. With `version` (from an earlier answer) and
+    `wait`, the request is held until the job changes or `wait` seconds pass.
+    """
+    if version is not None and wait > 0:
+        job = await job_events.wait(file_id, version, min(wait, LONG_POLL_MAX_SECONDS))
+    else:
+        job = await repo.get_job(file_id)
+    if not job:
+        return {"status": "Not Found"}
+    return status_payload(job)
+
+
+@app.get("/events/{file_id}")
+async def job_event_stream(request: Request, file_id: str):
+    """Server-sent events for view.html: one event per job change, closed once the job ends."""
+    async def events():
+        yield "retry: 3000\n\n"
+        job = await repo.get_job(file_id)
+        version = None
+        while not await request.is_disconnected():
+            if job is None:
+                yield f"data: {json.dumps({'status': 'Not Found'})}\n\n"
+                return
+            if job["version"] == version:
+                yield ": keepalive\n\n"
+            else:
+                version = job["version"]
+                yield f"id: {version}\ndata: {json.dumps(status_payload(job))}\n\n"
+                if job["state"] in ("done", "failed"):
+                    return
+            job = await job_events.wait(file_id, version, SSE_KEEPALIVE_SECONDS)
+
+    # X-Accel-Buffering keeps nginx from holding events back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/processed/{file_id}")
 async def processed_page(request: Request, file_id: str):
-    """Final landing page once OCR is done. Replaces the old 'Processed' logic."""
+    """Final landing page once OCR is done. Rows are fetched page by page from /results."""
 
-    job = db_status.get(file_id)
+    job = await owned_job(request, file_id)
     if not job:
-        return RedirectResponse(url="/dashboard")
-    
-    # Logic to read the Excel file and display records in a table
-    if job["status"] == "Completed" and job["file"]:
-        try:
-            df = pd.read_excel(job["file"])
-            # Fill NaN values to avoid template errors and convert to list of dicts
-            job["records"] = df.fillna("").to_dict(orient="records")
-        except Exception as e:
-            job["records"] = []
-            print(f"Error loading Excel: {e}")
-    else:
-        job["records"] = []
+        raise HTTPException(status_code=404, detail="Job not found")
 
     return templates.TemplateResponse("processed.html", {
         "request": request, 
         "file_id": file_id, 
-        "job": job
+        "job": job,
+        "page_size": RESULTS_PAGE_SIZE,
     })
 
+@app.get("/results/{file_id}")
+async def results_api(request: Request, file_id: str, page: int = 1, page_size: int = RESULTS_PAGE_SIZE, q: str = "", gender: str = ""):
+    """One page of a job's records, filtered by free text and gender; partial while the job runs."""
+    job = await owned_job(request, file_id)
+    if not job or job["state"] == "failed":
+        return JSONResponse({"error": "Results not ready or not found"}, status_code=404)
+    # While the job runs, the pages finished so far are served from their parts
+    xlsx_path = job.get("file") or os.path.join(UPLOAD_DIR, f"{file_id}.xlsx")
+    try:
+        result = await run_in_threadpool(query_results, xlsx_path, page, page_size, q, {"Gender": gender})
+    except FileNotFoundError:
+        return JSONResponse({"error": "Results not ready or not found"}, status_code=404)
+    result["partial"] = job["status"] != "Completed"
+    return result
+
 # ============================
 # Download
 # ============================
 @app.get("/download/{file_id}")
-async def download_file(file_id: str):
-    """Simple download route for the generated Excel file."""
-    job = db_status.get(file_id)
+async def download_file(request: Request, file_id: str, format: str = "xlsx"):
+    """Download of the result as xlsx (default), csv or parquet; other formats are built on first request."""
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"Unknown format: {format}"}, status_code=400)
+    job = await owned_job(request, file_id)
     if job and job.get("file"):
+        path = await run_in_threadpool(export_path, job["file"], format)
         return FileResponse(
-            job["file"], 
-            filename=f"voter_data_{file_id[:8]}.xlsx",
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            path, 
+            filename=f"voter_data_{file_id[:8]}.{format}",
+            media_type=EXPORT_FORMATS[format]
         )
-    return {"error": "File not ready or not found"}
+    return JSONResponse({"error": "File not ready or not found"}, status_code=404)
 
 def require_login(request: Request):
     return "user_id" in request.session
@@ -307,15 +418,18 @@ def require_login(request: Request):
 # extracted
 # ============================
 @app.get("/extracted", response_class=HTMLResponse)
-async def get_extracted_list(request: Request):
-    """Route to view the list of all processed files"""
-    if not request.session.get("user"):
+async def get_extracted_list(request: Request, before: str = None):
+    """Route to view the user's processed files, newest first, one page per cursor"""
+    user = request.session.get("user")
+    if not user:
         return RedirectResponse("/login")
-    
-    # We pass 'db_status' as 'jobs' to match your template loop
+
+    jobs, next_cursor = await repo.job_page(user, JOBS_PAGE_SIZE, before)
     return templates.TemplateResponse("extracted.html", {
-        "request": request, 
-        "jobs": db_status
+        "request": request,
+        "jobs": jobs,
+        "next_cursor": next_cursor,
+        "first_page": not before,
     })
 
 # ============================
@@ -327,23 +441,13 @@ async def get_profile(request: Request):
     email = request.session.get("user")
     if not email: return RedirectResponse("/login")
     
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT full_name, email, phone, avatar_url FROM users WHERE email = %s", (email,))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    user = await repo.get_profile(email)
     return templates.TemplateResponse("profile.html", {"request": request, "user": user})
 
 @app.post("/update-profile")
 async def update_profile(request: Request, fullName: str = Form(...), phone: str = Form(None)):
     email = request.session.get("user")
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET full_name = %s, phone = %s WHERE email = %s", (fullName, phone, email))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    await repo.update_profile(email, fullName, phone)
     return {"status": "success"}
 
 @app.post("/update-avatar")
@@ -353,23 +457,13 @@ async def update_avatar(request: Request, file: UploadFile = File(...)):
     encoded = base64.b64encode(contents).decode()
     avatar_data = f"data:{file.content_type};base64,{encoded}"
     
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET avatar_url = %s WHERE email = %s", (avatar_data, email))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    await repo.set_avatar(email, avatar_data)
     return {"status": "success"}
 
 @app.post("/remove-avatar")
 async def remove_avatar(request: Request):
     email = request.session.get("user")
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET avatar_url = NULL WHERE email = %s", (email,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    await repo.set_avatar(email, None)
     return {"status": "success"}
 
 # ============================
@@ -381,12 +475,7 @@ async def settings_page(request: Request):
     if not user_email:
         return RedirectResponse("/login")
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT full_name, phone FROM users WHERE email = %s", (user_email,))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    user = await repo.get_settings(user_email)
 
     return templates.TemplateResponse("settings.html", {
         "request": request,
@@ -417,11 +506,6 @@ async def update_preferences(
     theme: str = Form(...)
 ):
     user_email = request.session.get("user")
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET phone = %s WHERE email = %s", (phone, user_email))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    await repo.update_phone(user_email, phone)
 
     return RedirectResponse("/settings?msg=Preferences+saved&type=success", status_code=303)
\ No newline at end of file
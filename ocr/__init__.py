@@ -1,2 +1,9 @@
-from .voter_ocr import extract_voter_boxes, split_voter_box, get_ocr_text
-from ocr.voterid_ocr import OCRProcessor
\ No newline at end of file
+from .voter_ocr import extract_voter_boxes, split_voter_box, get_ocr_text, iter_pdf_pages, ocr_page_boxes
+from ocr.voterid_ocr import OCRProcessor
+from .executor import get_ocr_executor, PoolOCRExecutor, SerialOCRExecutor
+from .backends import get_backend, PytesseractBackend, TesserocrBackend
+from .crop_cache import get_crop_cache, CropCache
+from .layout import VoterLayout
+from .grid_template import GridTemplate
+from .page_classifier import classify_page
+from .card_batch import iter_cards, ocr_cards, get_card_executor
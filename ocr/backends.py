@@ -0,0 +1,112 @@
+import os
+import re
+import threading
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # optional, needs libtesseract at build time
+    tesserocr = None
+
+
+def parse_tesseract_config(config):
+    """Pulls --oem/--psm out of a pytesseract-style config string."""
+    oem = re.search(r"--oem\s+(\d+)", config or "")
+    psm = re.search(r"--psm\s+(\d+)", config or "")
+    return (int(oem.group(1)) if oem else 3), (int(psm.group(1)) if psm else 3)
+
+
+def parse_tsv(tsv):
+    """Turns tesseract TSV output into word dicts (level 5 rows with text)."""
+    words = []
+    for row in tsv.splitlines():
+        cols = row.split("\t")
+        if len(cols) < 12 or cols[0] != "5" or not cols[11].strip():
+            continue
+        block, par, line = int(cols[2]), int(cols[3]), int(cols[4])
+        left, top, width, height = (int(c) for c in cols[6:10])
+        words.append({
+            "line": (block, par, line),
+            "left": left, "top": top, "width": width, "height": height,
+            "conf": float(cols[10]),
+            "text": cols[11],
+        })
+    return words
+
+
+def to_pil(img):
+    """OpenCV crops are BGR numpy arrays; tesserocr wants PIL images."""
+    if isinstance(img, Image.Image):
+        return img
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return Image.fromarray(np.ascontiguousarray(img))
+
+
+class PytesseractBackend:
+    """Original path: one tesseract subprocess per call."""
+    name = "pytesseract"
+
+    def image_to_string(self, img, config, lang):
+        return pytesseract.image_to_string(img, config=config, lang=lang)
+
+    def image_to_words(self, img, config, lang):
+        return parse_tsv(pytesseract.image_to_data(img, config=config, lang=lang))
+
+
+class TesserocrBackend:
+    """Long-lived tesseract engines through the C API, one per (lang, oem, psm) per thread."""
+    name = "tesserocr"
+
+    def __init__(self):
+        if tesserocr is None:
+            raise RuntimeError("OCR_BACKEND=tesserocr but the tesserocr package is not installed")
+        self._local = threading.local()
+
+    def _engine(self, lang, oem, psm):
+        # Engines are never shared across forks or threads
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.pid = os.getpid()
+            self._local.engines = {}
+        key = (lang, oem, psm)
+        api = self._local.engines.get(key)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem, psm=psm)
+            self._local.engines[key] = api
+        return api
+
+    def image_to_string(self, img, config, lang):
+        oem, psm = parse_tesseract_config(config)
+        api = self._engine(lang, oem, psm)
+        api.SetImage(to_pil(img))
+        text = api.GetUTF8Text()
+        api.Clear()
+        return text
+
+    def image_to_words(self, img, config, lang):
+        oem, psm = parse_tesseract_config(config)
+        api = self._engine(lang, oem, psm)
+        api.SetImage(to_pil(img))
+        api.Recognize()
+        tsv = api.GetTSVText(0)
+        api.Clear()
+        return parse_tsv(tsv)
+
+
+_backend = None
+
+
+def get_backend():
+    """Backend chosen by OCR_BACKEND: auto (default), tesserocr or pytesseract."""
+    global _backend
+    if _backend is None:
+        choice = os.getenv("OCR_BACKEND", "auto").lower()
+        if choice == "tesserocr" or (choice == "auto" and tesserocr is not None):
+            _backend = TesserocrBackend()
+        else:
+            _backend = PytesseractBackend()
+    return _backend
@@ -0,0 +1,90 @@
+import logging
+import os
+import threading
+import zipfile
+
+import cv2
+import numpy as np
+
+from .executor import default_worker_count, PoolOCRExecutor, SerialOCRExecutor
+from .voterid_ocr import OCRProcessor, load_card_images
+
+CARD_IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp")
+# Cards decoded ahead of the pool; 0 means twice the worker count. A PDF card page is
+# a 300 DPI render (~26 MB for A4), held here and again pickled to a worker
+CARD_WINDOW = int(os.getenv("CARD_WINDOW", 0))
+# ZIP members larger than this (uncompressed) are skipped instead of read into memory
+CARD_MAX_MEMBER_BYTES = int(os.getenv("CARD_MAX_MEMBER_BYTES", 20 * 1024 * 1024))
+
+log = logging.getLogger(__name__)
+
+# One processor per thread (a pool worker process has one), built on first use and
+# kept for every later card; tesserocr handles must not be shared between threads
+_local = threading.local()
+
+
+def card_text(img):
+    processor = getattr(_local, "processor", None)
+    if processor is None:
+        processor = _local.processor = OCRProcessor()
+    return processor.get_image_text(img)
+
+
+def iter_cards(file_path):
+    """
+    Yields (source, image) for every card of an upload: each image in a ZIP
+    (PDFs inside it count one card per page), each page of a PDF, or a single image.
+    """
+    name = os.path.basename(file_path)
+    if not zipfile.is_zipfile(file_path):
+        for no, img in enumerate(load_card_images(file_path), start=1):
+            yield f"{name}#{no}", img
+        return
+
+    with zipfile.ZipFile(file_path) as archive:
+        for index, info in enumerate(sorted(archive.infolist(), key=lambda i: i.filename)):
+            member, lower = info.filename, info.filename.lower()
+            if not lower.endswith(CARD_IMAGE_EXTS + (".pdf",)):
+                continue
+            if info.file_size > CARD_MAX_MEMBER_BYTES:
+                log.warning("Skipping %s in %s: %d bytes uncompressed", member, name, info.file_size)
+                continue
+            if lower.endswith(CARD_IMAGE_EXTS):
+                img = cv2.imdecode(np.frombuffer(archive.read(member), np.uint8), cv2.IMREAD_COLOR)
+                if img is not None:
+                    yield member, img
+            elif lower.endswith(".pdf"):
+                # pdf2image needs a path; unpack next to the upload and clean up after
+                tmp_path = f"{file_path}.{index}.pdf"
+                with open(tmp_path, "wb") as f:
+                    f.write(archive.read(member))
+                try:
+                    for no, img in enumerate(load_card_images(tmp_path), start=1):
+                        yield f"{member}#{no}", img
+                finally:
+                    os.remove(tmp_path)
+
+
+def ocr_cards(file_path, executor):
+    """Yields (source, text) in upload order, OCRing a window of cards at a time."""
+    size = CARD_WINDOW or 2 * getattr(executor, "workers", 1)
+    window = []
+    for card in iter_cards(file_path):
+        window.append(card)
+        if len(window) >= size:
+            yield from zip((s for s, _ in window), executor.map([img for _, img in window]))
+            window = []
+    if window:
+        yield from zip((s for s, _ in window), executor.map([img for _, img in window]))
+
+
+_executor = None
+
+
+def get_card_executor():
+    """Process-wide pool of card OCR workers, each holding its own OCRProcessor."""
+    global _executor
+    if _executor is None:
+        workers = default_worker_count()
+        _executor = SerialOCRExecutor(card_text) if workers == 1 else PoolOCRExecutor(workers, card_text)
+    return _executor
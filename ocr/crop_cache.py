@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", os.path.join("uploads", "ocr_cache.db"))
+# Set OCR_CACHE=0 to always call tesseract
+ENABLED = os.getenv("OCR_CACHE", "1") != "0"
+MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", 500_000))
+# Counters are written to the database every this many lookups (pool workers are separate processes)
+FLUSH_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key       TEXT PRIMARY KEY,
+    text      TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_cache_lru ON ocr_cache (last_used);
+CREATE TABLE IF NOT EXISTS ocr_cache_stats (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def crop_key(img, config, lang, backend):
+    """Exact pixel hash of the crop plus everything that changes tesseract's answer."""
+    img = np.ascontiguousarray(img)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{img.shape}|{img.dtype}|{config}|{lang}|{backend}".encode())
+    h.update(img.data)
+    return h.hexdigest()
+
+
+class CropCache:
+    """Disk-backed OCR text cache with LRU eviction and hit/miss counters."""
+
+    def __init__(self, path=OCR_CACHE_DB, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending = {"hits": 0, "misses": 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # Per thread and per process: pool workers must not inherit the parent's handle
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get_or_compute(self, key, compute):
+        conn = self._conn()
+        row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count("hits")
+            return row[0]
+        text = compute()
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, text, last_used) VALUES (?, ?, ?)",
+            (key, text, time.time()),
+        )
+        self._count("misses")
+        return text
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._pending[name] += 1
+            if sum(self._pending.values()) < FLUSH_EVERY:
+                return
+            pending, self._pending = self._pending, {"hits": 0, "misses": 0}
+        self._flush(pending)
+
+    def _flush(self, pending):
+        conn = self._conn()
+        for name, value in pending.items():
+            conn.execute(
+                "INSERT INTO ocr_cache_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value),
+            )
+        if pending["misses"]:
+            self.evict()
+
+    def evict(self):
+        """Drops the least recently used 10% once the cache is over its entry budget."""
+        conn = self._conn()
+        count = conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + self.max_entries // 10
+        conn.execute(
+            "DELETE FROM ocr_cache WHERE key IN (SELECT key FROM ocr_cache ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+
+    def stats(self):
+        """Counters summed over every process that has flushed, plus this one's unflushed share."""
+        rows = dict(self._conn().execute("SELECT name, value FROM ocr_cache_stats").fetchall())
+        with self._lock:
+            hits = rows.get("hits", 0) + self._pending["hits"]
+            misses = rows.get("misses", 0) + self._pending["misses"]
+        entries = self._conn().execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+        return {"hits": hits, "misses": misses, "entries": entries}
+
+
+_cache = None
+
+
+def get_crop_cache():
+    global _cache
+    if _cache is None and ENABLED:
+        _cache = CropCache()
+    return _cache
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .voter_ocr import get_ocr_text
+
+# Pools are created from worker threads of a multithreaded web process, where a
+# plain fork can copy a held lock into the child and deadlock it
+MP_START_METHOD = os.getenv(
+    "OCR_MP_START", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def default_worker_count():
+    """Worker count from OCR_WORKERS, falling back to the cores this process may use."""
+    configured = int(os.getenv("OCR_WORKERS", 0))
+    if configured > 0:
+        return configured
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class SerialOCRExecutor:
+    """Runs every crop in the calling process, one after another."""
+
+    def __init__(self, ocr_fn=get_ocr_text):
+        self.ocr_fn = ocr_fn
+
+    def map(self, crops):
+        return [self.ocr_fn(crop) for crop in crops]
+
+    def shutdown(self):
+        pass
+
+
+class PoolOCRExecutor:
+    """
+    Fans crops out over a bounded process pool and returns texts in input order.
+    A pool broken by a dead worker (OOM-killed on a large page, say) is replaced
+    and the batch retried once, so one crash does not fail every later job.
+    """
+
+    def __init__(self, workers=None, ocr_fn=get_ocr_text):
+        self.workers = workers or default_worker_count()
+        self.ocr_fn = ocr_fn
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context(MP_START_METHOD)
+        )
+
+    def _replace_pool(self, broken):
+        # Several jobs share the pool; only the first to see it broken rebuilds it
+        with self._lock:
+            if self._pool is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+
+    def map(self, crops):
+        crops = list(crops)
+        if not crops:
+            return []
+        # Small chunks keep every worker busy on the ~60 crops of a page
+        chunksize = max(1, len(crops) // (self.workers * 4))
+        pool = self._pool
+        try:
+            return list(pool.map(self.ocr_fn, crops, chunksize=chunksize))
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            return list(self._pool.map(self.ocr_fn, crops, chunksize=chunksize))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_executor = None
+
+
+def get_ocr_executor():
+    """Process-wide executor shared by all jobs, so the pool size is the real core budget."""
+    global _executor
+    if _executor is None:
+        workers = default_worker_count()
+        _executor = SerialOCRExecutor() if workers == 1 else PoolOCRExecutor(workers)
+    return _executor
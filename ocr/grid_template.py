@@ -0,0 +1,98 @@
+import cv2
+
+from .voter_ocr import extract_voter_boxes, page_array
+
+# Pixels darker than this count as grid-line ink when re-checking a page
+INK_LEVEL = 160
+# Points sampled along each edge of every box
+SAMPLES_PER_EDGE = 4
+# Share of a box's sampled points that must sit on ink for the cached grid to be reused;
+# checked per box, so one missing box (a part-filled last page) forces full detection
+MIN_HIT_RATE = 0.9
+
+
+def grid_offset(a, b):
+    """Largest offset between each box of a and its nearest box in b (inf if counts differ)."""
+    if len(a) != len(b):
+        return float("inf")
+    worst = 0
+    for box in a:
+        worst = max(worst, min(max(abs(p - q) for p, q in zip(box, other)) for other in b))
+    return worst
+
+
+class GridTemplate:
+    """
+    Learns the box grid of one roll from its first pages and reuses it on later pages
+    after a cheap check that the grid lines are still where the template expects them.
+    Falls back to full detection whenever the check fails.
+    """
+
+    def __init__(self, dpi=200, scale=1.0):
+        self.dpi = dpi
+        self.scale = scale
+        self.tolerance = max(2, int(round(dpi * 0.015)))
+        self.boxes = None
+        self._last = None
+        self.reused = 0
+        self.detected = 0
+
+    def _learn_windows(self, gray):
+        """
+        Pins each sample to the actual grid line near the box edge (bounding rects
+        overshoot the lines by a few pixels), keeping a small window around it.
+        Returns one list of windows per box.
+        """
+        search = 4 * self.tolerance
+        t = self.tolerance
+        box_windows = []
+        for x, y, w, h in self.boxes:
+            windows = []
+            box_windows.append(windows)
+            for i in range(1, SAMPLES_PER_EDGE + 1):
+                px = x + w * i // (SAMPLES_PER_EDGE + 1)
+                py = y + h * i // (SAMPLES_PER_EDGE + 1)
+                for edge in (y, y + h - 1):
+                    lo = max(edge - search, 0)
+                    profile = gray[lo:edge + search + 1, px]
+                    if profile.size and profile.min() < INK_LEVEL:
+                        line = lo + int(profile.argmin())
+                        windows.append((line - t, line + t + 1, px, px + 1))
+                for edge in (x, x + w - 1):
+                    lo = max(edge - search, 0)
+                    profile = gray[py, lo:edge + search + 1]
+                    if profile.size and profile.min() < INK_LEVEL:
+                        line = lo + int(profile.argmin())
+                        windows.append((py, py + 1, line - t, line + t + 1))
+        return box_windows
+
+    def matches(self, gray):
+        """True only if every template box still has its grid lines on this page."""
+        for windows in self._windows:
+            hits = 0
+            for y0, y1, x0, x1 in windows:
+                patch = gray[max(y0, 0):y1, max(x0, 0):x1]
+                if patch.size and patch.min() < INK_LEVEL:
+                    hits += 1
+            if not windows or hits / len(windows) < MIN_HIT_RATE:
+                return False
+        return bool(self._windows)
+
+    def detect(self, page_img):
+        """Same contract as extract_voter_boxes: (boxes, cropping image)."""
+        if self.boxes is not None:
+            img = page_array(page_img)
+            gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            if self.matches(gray):
+                self.reused += 1
+                return list(self.boxes), img
+
+        boxes, img = extract_voter_boxes(page_img, scale=self.scale, dpi=self.dpi)
+        self.detected += 1
+        # Adopt a grid once two consecutive pages agree, so a cover page is never learned
+        if boxes and self._last is not None and grid_offset(boxes, self._last) <= self.tolerance:
+            self.boxes = boxes
+            gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            self._windows = self._learn_windows(gray)
+        self._last = boxes
+        return boxes, img
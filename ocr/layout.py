@@ -0,0 +1,37 @@
+# Voter-roll geometry in physical units (inches), so detection works at any DPI.
+# At 200 DPI these reproduce the original pixel constants:
+# 350 < w < 900, 180 < h < 350, threshold window 15, line kernel 40.
+BOX_MIN_W_IN = 1.75
+BOX_MAX_W_IN = 4.5
+BOX_MIN_H_IN = 0.9
+BOX_MAX_H_IN = 1.75
+THRESH_BLOCK_IN = 0.075
+LINE_KERNEL_IN = 0.2
+
+
+class VoterLayout:
+    """Pixel sizes of the voter-box grid for one rendering resolution."""
+
+    def __init__(self, dpi=200):
+        self.dpi = dpi
+
+    def px(self, inches):
+        return inches * self.dpi
+
+    @property
+    def threshold_block(self):
+        # adaptiveThreshold needs an odd window of at least 3
+        return max(3, int(round(self.px(THRESH_BLOCK_IN))) | 1)
+
+    @property
+    def line_kernel(self):
+        return max(2, int(round(self.px(LINE_KERNEL_IN))))
+
+    def accepts(self, w, h):
+        return (self.px(BOX_MIN_W_IN) < w < self.px(BOX_MAX_W_IN)
+                and self.px(BOX_MIN_H_IN) < h < self.px(BOX_MAX_H_IN))
+
+    def scale_boxes(self, boxes, to_dpi):
+        """Maps boxes found at this resolution onto a render at to_dpi."""
+        ratio = to_dpi / self.dpi
+        return [tuple(int(round(v * ratio)) for v in box) for box in boxes]
@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+
+from .layout import VoterLayout
+from .voter_ocr import page_array
+
+# Share of thumbnail pixels that must be ink for a page to count as not blank
+MIN_INK = 0.01
+# Enclosed cells of voter-box size a page needs before it gets a full render
+MIN_CELLS = 1
+# Cells are measured inside the grid lines, so they come out a little smaller than boxes
+CELL_SLACK = 1.1
+
+
+def classify_page(page_img, dpi=40):
+    """
+    Cheap look at a low-DPI thumbnail: "voter" when at least one cell of voter-box
+    size is enclosed by grid lines, "blank" when there is none and next to no ink,
+    otherwise "no_grid" (cover pages, maps, photo sheets). Cells are counted first:
+    a last page holding a single voter box is mostly white and must never be skipped.
+    """
+    layout = VoterLayout(dpi)
+    img = page_array(page_img)
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    bw = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, layout.threshold_block, 4)
+
+    line = layout.line_kernel
+    horizontal = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (line, 1)))
+    vertical = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, line)))
+    # Close the one-pixel gaps a thumbnail leaves where lines meet
+    grid = cv2.dilate(cv2.add(horizontal, vertical), np.ones((3, 3), np.uint8))
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(cv2.bitwise_not(grid), connectivity=4)
+    cells = sum(1 for _, _, w, h, _ in stats[1:] if layout.accepts(w * CELL_SLACK, h * CELL_SLACK))
+    if cells >= MIN_CELLS:
+        return "voter"
+    return "blank" if cv2.countNonZero(bw) < MIN_INK * bw.size else "no_grid"
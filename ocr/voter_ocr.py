@@ -1,31 +1,104 @@
 import cv2
-import pytesseract
 import numpy as np
 from pdf2image import convert_from_path
 from pdf2image import convert_from_bytes
+from pdf2image import pdfinfo_from_path
+from .backends import get_backend
+from .crop_cache import get_crop_cache, crop_key
+from .layout import VoterLayout
 
-def extract_voter_boxes(page_img):
-    img = cv2.cvtColor(np.array(page_img), cv2.COLOR_RGB2BGR)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    bw = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 4)
+# Share of a voter box holding the name/age block; the rest is the EPIC/photo column
+SPLIT_RATIO = 0.72
+
+def pdf_page_count(file_path):
+    return pdfinfo_from_path(file_path)["Pages"]
+
+def render_pdf_page(file_path, pg_no, dpi=200, grayscale=False):
+    pages = convert_from_path(file_path, dpi=dpi, first_page=pg_no, last_page=pg_no, grayscale=grayscale)
+    return pages[0] if pages else None
+
+def iter_pdf_pages(file_path, dpi=200, grayscale=False):
+    """Yields (page_no, image) one page at a time so only a single raster is alive."""
+    for pg_no in range(1, pdf_page_count(file_path) + 1):
+        page = render_pdf_page(file_path, pg_no, dpi=dpi, grayscale=grayscale)
+        if page is not None:
+            yield pg_no, page
+
+def page_array(page_img):
+    """PIL page -> array used for cropping: BGR for colour renders, 2-D for grayscale."""
+    img = np.array(page_img)
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+def extract_voter_boxes(page_img, scale=1.0, dpi=200):
+    """
+    Finds the voter boxes of a page rendered at `dpi`. With scale < 1 the grid lines
+    are found on a downscaled copy (threshold window and line kernels shrink with it)
+    and the boxes are mapped back to full resolution. Grayscale pages skip the colour
+    conversions; the returned image is then 2-D.
+    """
+    layout = VoterLayout(dpi)
+    detect = VoterLayout(dpi * scale)
+    img = page_array(page_img)
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    line = detect.line_kernel
+    bw = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, detect.threshold_block, 4)
     
-    horizontal = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1)), iterations=2)
-    vertical = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40)), iterations=2)
+    horizontal = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (line, 1)), iterations=2)
+    vertical = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, line)), iterations=2)
     
     grid = cv2.add(horizontal, vertical)
     contours, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     boxes = []
     for c in contours:
-        x, y, w, h = cv2.boundingRect(c)
-        if 350 < w < 900 and 180 < h < 350:
+        x, y, w, h = (int(round(v / scale)) for v in cv2.boundingRect(c))
+        if layout.accepts(w, h):
             boxes.append((x, y, w, h))
     
     return sorted(boxes, key=lambda b: (b[1], b[0])), img
 
 def split_voter_box(img, x, y, w, h):
-    left_width = int(w * 0.72)
+    left_width = int(w * SPLIT_RATIO)
     return img[y:y+h, x:x+left_width], img[y:y+h, x+left_width:x+w]
 
 def get_ocr_text(img_crop, config="--oem 3 --psm 6"):
-    return pytesseract.image_to_string(img_crop, config=config, lang="eng")
+    backend = get_backend()
+    cache = get_crop_cache()
+    if cache is None:
+        return backend.image_to_string(img_crop, config=config, lang="eng")
+    key = crop_key(img_crop, config, "eng", backend.name)
+    return cache.get_or_compute(key, lambda: backend.image_to_string(img_crop, config=config, lang="eng"))
+
+
+def join_words(words):
+    """Words in tesseract reading order back to text, one line per tesseract line."""
+    out, current = [], None
+    for word in words:
+        if current is not None and word["line"] != current:
+            out.append("\n")
+        elif out:
+            out.append(" ")
+        out.append(word["text"])
+        current = word["line"]
+    return "".join(out)
+
+
+def ocr_page_boxes(img, boxes, config="--oem 3 --psm 11"):
+    """
+    OCRs the whole page in one image_to_data call and maps each word back to the
+    box it falls in. Returns [(left_text, right_text), ...] in the order of boxes,
+    matching what split_voter_box + get_ocr_text would give per box.
+    """
+    words = get_backend().image_to_words(img, config=config, lang="eng")
+    lines = [([], []) for _ in boxes]
+    for word in words:
+        cx = word["left"] + word["width"] / 2
+        cy = word["top"] + word["height"] / 2
+        for i, (x, y, w, h) in enumerate(boxes):
+            if x <= cx < x + w and y <= cy < y + h:
+                side = 0 if cx < x + int(w * SPLIT_RATIO) else 1
+                lines[i][side].append(word)
+                break
+    return [(join_words(left), join_words(right)) for left, right in lines]
@@ -18,29 +18,196 @@
 #     data = parse_single_voter_text(combined_text)
 #     return [data] # Return as list for DataFrame compatibility
 
+import os
+import re
+import time
+from collections import defaultdict
+
 import cv2
-import pytesseract
 import numpy as np
+from .backends import get_backend
+from .voter_ocr import pdf_page_count, render_pdf_page, page_array, join_words
+
+# Cards are small; PDF pages are rendered finer than roll pages
+CARD_DPI = 300
+
+# Preprocessing presets for preprocess_voter; "legacy" is the original fixed 2x + bilateral.
+#   crop:         cut the image down to the card before anything else
+#   text_px:      rescale so the median glyph is this tall (None: fixed `upscale`)
+#   max_upscale:  never enlarge more than this, however small the text
+#   denoise:      "bilateral", "median" or None
+PREPROCESS_PRESETS = {
+    "legacy": {"crop": False, "text_px": None, "upscale": 2.0, "max_upscale": 2.0, "denoise": "bilateral"},
+    "balanced": {"crop": True, "text_px": 30, "upscale": 1.0, "max_upscale": 2.0, "denoise": "median"},
+    "fast": {"crop": True, "text_px": 24, "upscale": 1.0, "max_upscale": 1.5, "denoise": None},
+}
+# "balanced" and "fast" stay opt-in until their accuracy has been compared with legacy on
+# real cards (bench_card_preprocess.py --ocr)
+CARD_PREPROCESS = os.getenv("CARD_PREPROCESS", "legacy")
+# "dual": the original single eng+hin pass. "routed": English over the whole card, Hindi
+# only on the gender line when English found no gender. Routed stays opt-in until its
+# accuracy has been compared with dual on real cards (bench_card_preprocess.py --ocr)
+CARD_LANG_MODE = os.getenv("CARD_LANG_MODE", "dual")
+# English words below this confidence are mostly misread Devanagari and are dropped
+MIN_ENG_CONF = 30
+# Same words VoterParser.extract_gender accepts from the English text
+ENGLISH_GENDER = re.compile(r"\b(male|female|other)\b", re.IGNORECASE)
+GENDER_LABEL = re.compile(r"gender|sex", re.IGNORECASE)
+
+# A card must cover this share of the photo to be cropped to; otherwise the whole image is kept
+MIN_CARD_AREA = 0.3
+# ...and be card-shaped (ID-1 is 85.6 x 54 mm, long side / short side ~1.59, either way up)
+# unless it fills nearly the whole image, so a photo or text block on the card is never
+# mistaken for the card itself
+CARD_ASPECT = (1.35, 1.85)
+FULL_IMAGE_AREA = 0.85
+# Crop and text measurements run on a copy no wider than this; the answers are scaled back
+MEASURE_WIDTH = 1000
+
+
+def _shrunk(gray):
+    """Copy of gray at most MEASURE_WIDTH wide, and the factor that maps it back."""
+    ratio = max(1.0, gray.shape[1] / MEASURE_WIDTH)
+    if ratio == 1.0:
+        return gray, ratio
+    return cv2.resize(gray, None, fx=1 / ratio, fy=1 / ratio, interpolation=cv2.INTER_AREA), ratio
+
+
+def crop_to_card(gray):
+    """Bounding box of the largest edge-enclosed region, i.e. the card on a phone photo."""
+    small, ratio = _shrunk(gray)
+    edges = cv2.Canny(small, 50, 150)
+    edges = cv2.dilate(edges, np.ones((5, 5), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return gray
+    x, y, w, h = (int(v * ratio) for v in cv2.boundingRect(max(contours, key=cv2.contourArea)))
+    area = w * h / gray.size
+    aspect = max(w, h) / max(min(w, h), 1)
+    if area < MIN_CARD_AREA:
+        return gray
+    if area < FULL_IMAGE_AREA and not CARD_ASPECT[0] <= aspect <= CARD_ASPECT[1]:
+        return gray
+    return gray[y:y + h, x:x + w]
+
+
+def text_height(gray):
+    """Median height in pixels of the glyph-like blobs on the image, or None if too few."""
+    small, ratio = _shrunk(gray)
+    bw = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(bw, connectivity=8)
+    max_h = small.shape[0] // 10
+    heights = [h for _, _, w, h, area in stats[1:] if 6 <= h <= max_h and w <= 2 * h and area >= 0.2 * w * h]
+    if len(heights) < 20:
+        return None
+    return float(np.median(heights)) * ratio
+
+
+def load_card_images(file_path):
+    """Yields every card image of a file: each page of a PDF, or the single image."""
+    if file_path.lower().endswith(".pdf"):
+        for pg_no in range(1, pdf_page_count(file_path) + 1):
+            page = render_pdf_page(file_path, pg_no, dpi=CARD_DPI)
+            if page is not None:
+                yield page_array(page)
+    else:
+        img = cv2.imread(file_path)
+        if img is not None:
+            yield img
+
+
+def gender_band(words, img):
+    """Horizontal strip around the line labelled Gender, or the whole card if there is none."""
+    label = next((w for w in words if GENDER_LABEL.search(w["text"])), None)
+    if label is None:
+        return img
+    line = [w for w in words if w["line"] == label["line"]]
+    top = min(w["top"] for w in line)
+    bottom = max(w["top"] + w["height"] for w in line)
+    pad = bottom - top
+    return img[max(top - pad, 0):bottom + pad]
 
 
 class OCRProcessor:
-    def __init__(self, lang='eng+hin'):
+    def __init__(self, lang='eng+hin', preset=CARD_PREPROCESS, lang_mode=CARD_LANG_MODE):
         self.config = r'--oem 3 --psm 11'
         self.lang = lang
+        self.lang_mode = lang_mode
+        # Cards that needed the Hindi follow-up pass in routed mode
+        self.hindi_passes = 0
+        self.preset = preset
+        self.options = PREPROCESS_PRESETS[preset]
+        # Seconds spent per stage, summed over every card this processor has seen
+        self.timings = defaultdict(float)
+        self.images = 0
+
+    def _timed(self, stage, fn, *args):
+        start = time.perf_counter()
+        out = fn(*args)
+        self.timings[stage] += time.perf_counter() - start
+        return out
+
+    def rescale_factor(self, gray):
+        opts = self.options
+        if opts["text_px"] is None:
+            return opts["upscale"]
+        height = self._timed("measure", text_height, gray)
+        if height is None:
+            return opts["upscale"]
+        # Shrinks oversized phone photos as well as enlarging small scans
+        return min(opts["text_px"] / height, opts["max_upscale"])
 
     def preprocess_voter(self, img):
+        opts = self.options
+        self.images += 1
         # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        # Resize for better OCR
-        gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+        gray = img if img.ndim == 2 else self._timed("gray", cv2.cvtColor, img, cv2.COLOR_BGR2GRAY)
+        if opts["crop"]:
+            gray = self._timed("crop", crop_to_card, gray)
+        # Resize for better OCR, only as far as the text needs
+        factor = self.rescale_factor(gray)
+        if abs(factor - 1.0) > 0.05:
+            interpolation = cv2.INTER_CUBIC if factor > 1 else cv2.INTER_AREA
+            gray = self._timed("resize", cv2.resize, gray, None, None, factor, factor, interpolation)
         # Light denoising
-        gray = cv2.bilateralFilter(gray, 9, 75, 75)
+        if opts["denoise"] == "bilateral":
+            gray = self._timed("denoise", cv2.bilateralFilter, gray, 9, 75, 75)
+        elif opts["denoise"] == "median":
+            gray = self._timed("denoise", cv2.medianBlur, gray, 3)
         return gray
 
-    def get_text(self, image_path):
-        img = cv2.imread(image_path)
-        if img is None:
-            return ""
+    def stage_timings(self):
+        """Average milliseconds per card for each stage run so far."""
+        return {stage: 1000 * total / max(self.images, 1) for stage, total in self.timings.items()}
+
+    def language_timings(self):
+        """Per-language OCR cost: total ms, ms per card, and how many cards needed a Hindi pass."""
+        stats = {
+            stage[len("ocr:"):]: {"total_ms": 1000 * total, "ms_per_card": 1000 * total / max(self.images, 1)}
+            for stage, total in self.timings.items() if stage.startswith("ocr:")
+        }
+        stats["hindi_passes"] = self.hindi_passes
+        return stats
+
+    def get_image_text(self, img):
+        """OCR of one card already in memory (BGR or grayscale array)."""
         processed = self.preprocess_voter(img)
-        text = pytesseract.image_to_string(processed, config=self.config, lang=self.lang)
-        return text
\ No newline at end of file
+        backend = get_backend()
+        if self.lang_mode == "dual":
+            return self._timed(f"ocr:{self.lang}", backend.image_to_string, processed, self.config, self.lang)
+
+        words = self._timed("ocr:eng", backend.image_to_words, processed, self.config, "eng")
+        text = join_words([w for w in words if w["conf"] >= MIN_ENG_CONF])
+        if ENGLISH_GENDER.search(text):
+            return text
+        # Gender only printed in Devanagari (or misread): one small Hindi pass where it is printed
+        self.hindi_passes += 1
+        band = gender_band(words, processed)
+        psm = "--oem 3 --psm 6" if band is not processed else self.config
+        return text + "\n" + self._timed("ocr:hin", backend.image_to_string, band, psm, "hin")
+
+    def get_text(self, source):
+        """Text of an image path, a PDF path (all pages joined) or an in-memory image."""
+        if isinstance(source, np.ndarray):
+            return self.get_image_text(source)
+        return "\n".join(self.get_image_text(img) for img in load_card_images(source))
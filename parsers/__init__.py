@@ -1,2 +1,5 @@
-from .voterP import parse_voter_text, extract_epic
-from .voteridP import VoterParser
\ No newline at end of file
+from .voterP import parse_voter_text, extract_epic, parse_voter_batch, extract_epic_batch
+from .voteridP import VoterParser
+
+# Bump whenever parser output changes so cached results are not reused
+PARSER_VERSION = 1
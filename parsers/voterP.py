@@ -1,4 +1,5 @@
 # import re
+import pandas as pd
 
 # def normalize_text(text):
 #     text = text.upper()
@@ -112,131 +113,204 @@ STOP_KEYS = ["HOUSE", "AGE", "GENDER", "EPIC", "PHOTO"]
 
 # --- HELPER FUNCTIONS ---
 
+# Same substitutions as the replace/sub chain below, as one translate table for the batch path
+_OCR_CHAR_FIXES = str.maketrans({"¢": "C", "|": "I", "!": "I", ";": ":", "=": ":", "+": ":", "?": ":"})
+_COLON_LIKE = re.compile(r"[;=+?]")
+_PHOTO_LABELS = re.compile(r"\bPHOTO\b|\bAVAILABLE\b")
+_WHITESPACE = re.compile(r"\s+")
+
 def normalize_text(text):
     """Standardizes text and removes common OCR symbols."""
     if not text: return ""
     text = text.upper()
     # Correct common character misinterpretations
     text = text.replace("¢", "C").replace("|", "I").replace("!", "I")
-    text = re.sub(r"[;=+?]", ":", text)
-    text = re.sub(r"\bPHOTO\b|\bAVAILABLE\b", " ", text)
+    text = _COLON_LIKE.sub(":", text)
+    text = _PHOTO_LABELS.sub(" ", text)
     # Collapse multiple spaces into one
-    text = re.sub(r"\s+", " ", text)
+    text = _WHITESPACE.sub(" ", text)
     return text.strip()
 
-def extract_between(text, start_keys, stop_keys):
-    """Extracts text between specific keys and cleans leading/trailing noise."""
-    start = r"(?:%s)\s*[:\-]?\s*" % "|".join(start_keys)
-    # Use positive lookahead for stop keys
-    stop = r"(?=\b(?:%s)\b)" % "|".join(stop_keys)
-
-    m = re.search(start + r"(.*?)" + stop, text, re.IGNORECASE)
-    if not m:
-        return "Not Stated"
-
-    value = m.group(1)
-    
-    # Clean leading OCR garbage (like / or > from box borders)
-    value = re.sub(r"^[^\w\s]+", "", value)
-    value = value.strip(" :-")
-
-    # Remove secondary noise if field labels leaked in
-    value = re.sub(r"\b(NAME|FATHER|HUSBAND)\b.*$", "", value)
-
-    return value.strip() if value else "Not Stated"
-
-def extract_name_and_guardian(text):
-    """Tag-aware parser for Name, Guardian Name, and Guardian Type."""
-    # 1. Extract Name (always occurs before any guardian or house tag)
-    name = extract_between(
-        text,
-        start_keys=["NAME"],
-        stop_keys=list(GUARDIAN_TAGS["FATHER"] + GUARDIAN_TAGS["HUSBAND"] + 
-                       GUARDIAN_TAGS["MOTHER"] + GUARDIAN_TAGS["OTHER"] + STOP_KEYS)
-    )
-
-    # 2. Identify Guardian Type and Extract corresponding name
-    guardian = "Not Stated"
-    guardian_type = "Not Stated"
-
-    for g_type, patterns in GUARDIAN_TAGS.items():
-        pattern_regex = r"\b(?:%s)\b" % "|".join(patterns)
-        if re.search(pattern_regex, text):
-            guardian = extract_between(text, start_keys=patterns, stop_keys=STOP_KEYS)
-            guardian_type = g_type
-            break
-
-    return name, guardian, guardian_type
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+# 3-4 letters followed by 6-8 digits
+_EPIC = re.compile(r"([A-Z]{3,4})(\d{6,8})")
 
 def extract_epic(text):
     """Cleans and extracts EPIC numbers (usually 3 letters + 7 digits)."""
     if not text: return "Not Stated"
     t = text.upper().replace("¢", "0")
-    t = re.sub(r"[^A-Z0-9]", "", t)
+    t = _NON_ALNUM.sub("", t)
 
     # Match 3-4 letters followed by 6-8 digits
-    m = re.search(r"([A-Z]{3,4})(\d{6,8})", t)
+    m = _EPIC.search(t)
     if m:
         letters, digits = m.groups()
         return f"{letters[:3]}{digits[:7]}"
     return "Not Stated"
 
-# def extract_age(text):
-#     """Finds numeric age values."""
-#     m = re.search(r"AGE\s*:?\s*(\d{1,3})", text)
-#     return m.group(1) if m else "Not Stated"
-def extract_age(text):
-    # This looks for any number after the word 'Age' or 'Aqe' (common OCR error)
-    match = re.search(r'(?:Age|Aqe|Agc)\s*[:\-\s]*(\d+)', text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    return "Not Stated"
-def extract_gender(text):
-    """Maps varied OCR outputs to standardized Gender labels."""
-    if re.search(r"\b(MALE|MAIA|MATE)\b", text):
-        return "Male"
-    if re.search(r"\b(FEMALE|FERNALE|FEMAIE|FAMATE)\b", text):
-        return "Female"
-    return "Not Stated"
+# --- COMPILED EXTRACTOR ---
+
+class VoterFieldExtractor:
+    """
+    Field rules for one voter box, with every pattern built from the tag lists
+    and compiled once at import. The only copy of these rules; the benchmark keeps
+    the original per-field helpers as a frozen reference to compare against.
+    """
+
+    def __init__(self):
+        all_guardian_keys = [k for keys in GUARDIAN_TAGS.values() for k in keys]
+        self.name = self._between(["NAME"], all_guardian_keys + STOP_KEYS)
+        # (type, presence check, value pattern) in GUARDIAN_TAGS priority order
+        self.guardians = [
+            (g_type, re.compile(r"\b(?:%s)\b" % "|".join(keys)), self._between(keys, STOP_KEYS))
+            for g_type, keys in GUARDIAN_TAGS.items()
+        ]
+        self.lead_noise = re.compile(r"^[^\w\s]+")
+        self.label_leak = re.compile(r"\b(NAME|FATHER|HUSBAND)\b.*$")
+        self.house = [
+            re.compile(r"HOUSE\s*NO\.?\s*[:\-]?\s*(.+)", re.IGNORECASE),
+            re.compile(r"HOUSE\s*NUMBER\s*[:\-]?\s*(.+)", re.IGNORECASE),
+            re.compile(r"H\.?\s*NO\.?\s*[:\-]?\s*(.+)", re.IGNORECASE),
+        ]
+        self.house_stop = re.compile(r"\b(AGE|GENDER|PHOTO|AVAILABLE|NAME|FATHER|HUSBAND)\b", re.IGNORECASE)
+        self.house_trim = re.compile(r"^[^\w]+|[^\w]+$")
+        self.age = re.compile(r'(?:Age|Aqe|Agc)\s*[:\-\s]*(\d+)', re.IGNORECASE)
+        self.male = re.compile(r"\b(MALE|MAIA|MATE)\b")
+        self.female = re.compile(r"\b(FEMALE|FERNALE|FEMAIE|FAMATE)\b")
+
+    @staticmethod
+    def _between(start_keys, stop_keys):
+        start = r"(?:%s)\s*[:\-]?\s*" % "|".join(start_keys)
+        stop = r"(?=\b(?:%s)\b)" % "|".join(stop_keys)
+        return re.compile(start + r"(.*?)" + stop, re.IGNORECASE)
+
+    def between(self, pattern, text):
+        m = pattern.search(text)
+        if not m:
+            return "Not Stated"
+        value = self.lead_noise.sub("", m.group(1))
+        value = value.strip(" :-")
+        value = self.label_leak.sub("", value)
+        return value.strip() if value else "Not Stated"
+
+    def house_no(self, text):
+        if not text: return "Not Stated"
+        for pattern in self.house:
+            m = pattern.search(text)
+            if m:
+                value = self.house_stop.split(m.group(1).strip())[0].strip()
+                value = self.house_trim.sub("", value)
+                return value if value else "Not Stated"
+        return "Not Stated"
 
-def extract_house_no(text):
-    """Specific logic for House Numbers to avoid field leakage."""
-    if not text: return "Not Stated"
-    
-    patterns = [
-        r"HOUSE\s*NO\.?\s*[:\-]?\s*(.+)",
-        r"HOUSE\s*NUMBER\s*[:\-]?\s*(.+)",
-        r"H\.?\s*NO\.?\s*[:\-]?\s*(.+)",
-    ]
-
-    for p in patterns:
-        m = re.search(p, text, re.IGNORECASE)
-        if m:
-            value = m.group(1).strip()
-            # Split if subsequent fields are merged into the same string
-            value = re.split(r"\b(AGE|GENDER|PHOTO|AVAILABLE|NAME|FATHER|HUSBAND)\b", 
-                             value, flags=re.IGNORECASE)[0].strip()
-            
-            # Remove leading/trailing non-alphanumeric junk
-            value = re.sub(r"^[^\w]+|[^\w]+$", "", value)
-            return value if value else "Not Stated"
-            
-    return "Not Stated"
+    def extract(self, text):
+        """Fields of one normalized voter box."""
+        guardian, g_type = "Not Stated", "Not Stated"
+        for candidate, present, pattern in self.guardians:
+            if present.search(text):
+                guardian, g_type = self.between(pattern, text), candidate
+                break
+
+        age = self.age.search(text)
+        if self.male.search(text):
+            gender = "Male"
+        elif self.female.search(text):
+            gender = "Female"
+        else:
+            gender = "Not Stated"
+
+        return {
+            "Name": self.between(self.name, text),
+            "Father/Husband": guardian,
+            "Guardian Type": g_type,
+            "House No": self.house_no(text),
+            "Age": age.group(1) if age else "Not Stated",
+            "Gender": gender,
+        }
+
+
+FIELD_EXTRACTOR = VoterFieldExtractor()
 
 # --- MAIN PARSER ---
 
 def parse_voter_text(text):
     """Unified function used by the background task in main.py."""
-    text = normalize_text(text)
-    
-    name, guardian, g_type = extract_name_and_guardian(text)
-
-    return {
-        "Name": name,
-        "Father/Husband": guardian, # Mapping 'Guardian' to your existing column name
+    data = FIELD_EXTRACTOR.extract(normalize_text(text))
+    data["EPIC No"] = "Not Stated"  # Populated via extract_epic in the main loop
+    return data
+
+# --- BATCH PARSER ---
+
+def _text_series(texts):
+    # Built as object dtype from Python strings and never converted: pandas' Arrow string
+    # dtype (.astype(str), even .map(str)) does not expand ligatures and ß in .str.upper()
+    # the way str.upper does (ﬁ -> FI, ß -> SS), and Tesseract emits both
+    return pd.Series(["" if pd.isna(t) else str(t) for t in texts], dtype=object)
+
+def _clean_between(values):
+    """Vector form of VoterFieldExtractor.between over extracted groups (NaN = no match)."""
+    E = FIELD_EXTRACTOR
+    values = (values.str.replace(E.lead_noise, "", regex=True)
+                    .str.strip(" :-")
+                    .str.replace(E.label_leak, "", regex=True)
+                    .str.strip())
+    return values.mask(values.isna() | (values == ""), "Not Stated")
+
+def normalize_text_batch(texts):
+    """normalize_text over a whole Series at once."""
+    s = _text_series(texts).str.upper().str.translate(_OCR_CHAR_FIXES)
+    s = s.str.replace(_PHOTO_LABELS, " ", regex=True)
+    return s.str.replace(_WHITESPACE, " ", regex=True).str.strip()
+
+def extract_epic_batch(texts):
+    """extract_epic over a whole Series at once."""
+    t = _text_series(texts).str.upper().str.replace("¢", "0", regex=False)
+    m = t.str.replace(_NON_ALNUM, "", regex=True).str.extract(_EPIC)
+    return (m[0].str[:3] + m[1].str[:7]).fillna("Not Stated")
+
+def parse_voter_batch(texts):
+    """
+    Vectorized parse_voter_text: one row per OCR text, same columns and values,
+    built with pandas .str regex operations over the whole page/document. Parity is
+    checked by benchmarks/bench_voter_parser.py. pandas still runs these regexes per
+    element, so jobs and reparses keep the faster compiled row path.
+    """
+    E = FIELD_EXTRACTOR
+    s = normalize_text_batch(texts)
+    not_stated = pd.Series("Not Stated", index=s.index, dtype=object)
+
+    # Guardian: first tag group (in GUARDIAN_TAGS order) present anywhere wins
+    guardian, g_type = not_stated.copy(), not_stated.copy()
+    pending = pd.Series(True, index=s.index)
+    for candidate, present, pattern in E.guardians:
+        hit = pending & s.str.contains(present)
+        if hit.any():
+            guardian[hit] = _clean_between(s[hit].str.extract(pattern, expand=False))
+            g_type[hit] = candidate
+            pending &= ~hit
+
+    # House No: first pattern (in order) that matches wins
+    house = not_stated.copy()
+    pending = pd.Series(True, index=s.index)
+    for pattern in E.house:
+        found = s[pending].str.extract(pattern, expand=False).dropna()
+        if found.empty:
+            continue
+        values = (found.str.strip().str.split(E.house_stop, n=1, regex=True).str[0]
+                       .str.strip().str.replace(E.house_trim, "", regex=True))
+        house[values.index] = values.mask(values == "", "Not Stated")
+        pending[values.index] = False
+
+    gender = not_stated.copy()
+    gender[s.str.extract(E.female, expand=False).notna()] = "Female"
+    gender[s.str.extract(E.male, expand=False).notna()] = "Male"
+
+    return pd.DataFrame({
+        "Name": _clean_between(s.str.extract(E.name, expand=False)),
+        "Father/Husband": guardian,
         "Guardian Type": g_type,
-        "House No": extract_house_no(text),
-        "Age": extract_age(text),
-        "Gender": extract_gender(text),
-        "EPIC No": "Not Stated" # Populated via extract_epic in the main loop
-    }
\ No newline at end of file
+        "House No": house,
+        "Age": s.str.extract(E.age, expand=False).fillna("Not Stated"),
+        "Gender": gender,
+        "EPIC No": not_stated.copy(),
+    })
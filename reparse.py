@@ -0,0 +1,43 @@
+"""
+Rebuilds job results from their stored raw OCR text with the current parsers.
+
+    python reparse.py <file_id> [<file_id> ...]
+    python reparse.py --all
+
+Each job's workbook is replaced in place; no OCR is run.
+"""
+import argparse
+import os
+import time
+
+from jobs import job_store
+from tasks import raw_text_path, reparse_task
+
+UPLOAD_DIR = "uploads"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file_ids", nargs="*")
+    parser.add_argument("--all", action="store_true", help="reparse every completed job that has stored OCR text")
+    args = parser.parse_args()
+
+    if args.all:
+        file_ids = [fid for fid, job in job_store.all().items() if job["state"] == "done"]
+    else:
+        file_ids = args.file_ids
+
+    for file_id in file_ids:
+        job = job_store.get(file_id)
+        raw_path = raw_text_path(file_id, UPLOAD_DIR)
+        if not job or not os.path.exists(raw_path):
+            print(f"{file_id}: no stored OCR text, skipped")
+            continue
+        started = time.perf_counter()
+        reparse_task(file_id, raw_path, job["doc_type"])
+        job = job_store.get(file_id)
+        print(f"{file_id}: {job['status']}, {job['count']} records in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Async data access for the routes. mysql.connector and the SQLite job store both
+block, so every call runs in the threadpool and the event loop stays free for
+other requests (the /status polls in particular).
+"""
+from starlette.concurrency import run_in_threadpool
+
+from db import db_connection
+from jobs import job_store
+
+
+def _fetch_one(sql, params):
+    with db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+
+def _execute(sql, params):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+# ============================
+# users
+# ============================
+async def get_user(email):
+    """Full row, password hash included; only for login."""
+    return await run_in_threadpool(_fetch_one, "SELECT * FROM users WHERE email = %s", (email,))
+
+async def get_user_card(email):
+    """Name and avatar for the top-bar profile chip."""
+    return await run_in_threadpool(_fetch_one, "SELECT full_name, avatar_url FROM users WHERE email = %s", (email,))
+
+async def get_profile(email):
+    return await run_in_threadpool(
+        _fetch_one, "SELECT full_name, email, phone, avatar_url FROM users WHERE email = %s", (email,)
+    )
+
+async def get_settings(email):
+    return await run_in_threadpool(_fetch_one, "SELECT full_name, phone FROM users WHERE email = %s", (email,))
+
+async def email_exists(email):
+    return await run_in_threadpool(_fetch_one, "SELECT email FROM users WHERE email = %s", (email,)) is not None
+
+async def create_user(full_name, email, password_hash):
+    await run_in_threadpool(
+        _execute, "INSERT INTO users (full_name, email, password_hash) VALUES (%s, %s, %s)",
+        (full_name, email, password_hash),
+    )
+
+async def update_profile(email, full_name, phone):
+    await run_in_threadpool(_execute, "UPDATE users SET full_name = %s, phone = %s WHERE email = %s", (full_name, phone, email))
+
+async def update_phone(email, phone):
+    await run_in_threadpool(_execute, "UPDATE users SET phone = %s WHERE email = %s", (phone, email))
+
+async def set_avatar(email, avatar_url):
+    await run_in_threadpool(_execute, "UPDATE users SET avatar_url = %s WHERE email = %s", (avatar_url, email))
+
+async def ping():
+    await run_in_threadpool(_fetch_one, "SELECT 1", ())
+
+
+# ============================
+# jobs
+# ============================
+async def get_job(file_id):
+    return await run_in_threadpool(job_store.get, file_id)
+
+async def recent_jobs(owner, limit=5):
+    return await run_in_threadpool(job_store.recent, owner, limit)
+
+async def job_page(owner, limit, before=None):
+    """(jobs, next cursor) of one user, newest first; see JobStore.page."""
+    return await run_in_threadpool(job_store.page, owner, limit, before)
+
+async def job_stats(owner):
+    return await run_in_threadpool(job_store.stats, owner)
+
+async def create_job(*args, **kwargs):
+    await run_in_threadpool(job_store.create, *args, **kwargs)
+
+async def update_job(file_id, **fields):
+    await run_in_threadpool(job_store.update, file_id, **fields)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from jobs import JOBS_DB, open_db
+
+CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("uploads", "cache"))
+# Total bytes of cached workbooks kept before least-recently-used entries are evicted
+MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    cache_key TEXT PRIMARY KEY,
+    file      TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_result_cache_lru ON result_cache (last_used);
+"""
+
+
+def make_key(content_sha256, doc_type, ocr_config, parser_version):
+    """Same bytes, same document type, same OCR settings and parser -> same records."""
+    raw = "|".join([content_sha256, doc_type, ocr_config, str(parser_version)])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _raw_copy(cached):
+    """Raw OCR text sidecar kept next to a cached workbook, so hits can still be reparsed."""
+    return cached[:-len(".xlsx")] + ".raw.jsonl.gz"
+
+
+class ResultCache:
+    """Finished workbooks (and their raw OCR text) keyed by upload content, evicted LRU by total size."""
+
+    def __init__(self, path=JOBS_DB, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_db(self.path)
+        return conn
+
+    def lookup(self, cache_key, dest_path, raw_dest=None):
+        """
+        On a hit, materializes the cached workbook at dest_path (and the raw OCR text
+        at raw_dest, when cached) and returns the record count.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT file, count FROM result_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            _link_or_copy(row["file"], dest_path)
+        except OSError:
+            # File vanished under us; treat as a miss and forget the entry
+            conn.execute("DELETE FROM result_cache WHERE cache_key = ?", (cache_key,))
+            return None
+        if raw_dest and os.path.exists(_raw_copy(row["file"])):
+            # Copied, not linked: a job's sidecar is rewritten in place when it resumes
+            shutil.copyfile(_raw_copy(row["file"]), raw_dest)
+        conn.execute(
+            "UPDATE result_cache SET last_used = ? WHERE cache_key = ?",
+            (datetime.now().isoformat(), cache_key),
+        )
+        return row["count"]
+
+    def store(self, cache_key, output_path, count, raw_path=None):
+        cached = os.path.join(self.cache_dir, f"{cache_key}.xlsx")
+        if not os.path.exists(cached):
+            _link_or_copy(output_path, cached)
+        size = os.path.getsize(cached)
+        if raw_path and os.path.exists(raw_path):
+            shutil.copyfile(raw_path, _raw_copy(cached))
+            size += os.path.getsize(raw_path)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO result_cache (cache_key, file, count, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (cache_key, cached, count, size, datetime.now().isoformat()),
+        )
+        self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT cache_key, file, size FROM result_cache ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM result_cache WHERE cache_key = ?", (row["cache_key"],))
+            for path in (row["file"], _raw_copy(row["file"])):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= row["size"]
+
+
+result_cache = ResultCache()
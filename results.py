@@ -0,0 +1,130 @@
+import glob
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Loaded result frames kept in memory, most recently viewed last
+FRAME_CACHE_SIZE = int(os.getenv("RESULTS_FRAME_CACHE", 8))
+MAX_PAGE_SIZE = 500
+
+
+def results_path(xlsx_path):
+    """Parquet copy of a result workbook; what the results pages read instead of the xlsx."""
+    return xlsx_path[:-len(".xlsx")] + ".parquet"
+
+
+def _write_parquet(df, path):
+    tmp_path = path + ".tmp"
+    # Parquet needs one type per column; OCR fields mix "Not Stated" with numbers
+    df.fillna("").astype(str).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def save_frame(df, xlsx_path):
+    _write_parquet(df, results_path(xlsx_path))
+
+
+# ============================
+# per-page parts of a running job
+# ============================
+def parts_dir(xlsx_path):
+    """Records of every finished page of a running job, one Parquet file per page."""
+    return xlsx_path[:-len(".xlsx")] + ".parts"
+
+
+def write_part(xlsx_path, pg_no, records):
+    directory = parts_dir(xlsx_path)
+    os.makedirs(directory, exist_ok=True)
+    _write_parquet(pd.DataFrame(records), os.path.join(directory, f"page-{pg_no:05d}.parquet"))
+
+
+def part_files(xlsx_path):
+    return sorted(glob.glob(os.path.join(parts_dir(xlsx_path), "page-*.parquet")))
+
+
+def read_parts(xlsx_path):
+    files = part_files(xlsx_path)
+    if not files:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+
+
+def remove_parts(xlsx_path):
+    shutil.rmtree(parts_dir(xlsx_path), ignore_errors=True)
+
+
+def ensure_parquet(xlsx_path):
+    path = results_path(xlsx_path)
+    if not os.path.exists(path):
+        # Results from before the Parquet copy, or linked in from the result cache
+        save_frame(pd.read_excel(xlsx_path), xlsx_path)
+    return path
+
+
+class FrameCache:
+    """LRU of result frames keyed by file and mtime, so a rewritten result is never served stale."""
+
+    def __init__(self, size=FRAME_CACHE_SIZE):
+        self.size = size
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, xlsx_path):
+        """Frame of a finished result, or of the pages published so far while the job runs."""
+        if os.path.exists(xlsx_path):
+            path = ensure_parquet(xlsx_path)
+            key = (path, os.path.getmtime(path))
+            load = lambda: pd.read_parquet(path)
+        else:
+            # Parts are only ever added (or rewritten on a retried page), never edited in place
+            files = part_files(xlsx_path)
+            if not files:
+                raise FileNotFoundError(xlsx_path)
+            key = (parts_dir(xlsx_path), len(files), os.path.getmtime(files[-1]))
+            load = lambda: read_parts(xlsx_path)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+        df = load().fillna("")
+        # One lower-cased line per row for the free-text filter
+        search = df.astype(str).agg(" ".join, axis=1).str.lower() if len(df) else pd.Series([], dtype=str)
+        with self._lock:
+            self._frames[key] = (df, search)
+            while len(self._frames) > self.size:
+                self._frames.popitem(last=False)
+        return df, search
+
+
+frame_cache = FrameCache()
+
+
+def query_results(xlsx_path, page=1, page_size=50, q="", filters=None):
+    """
+    One page of a result, optionally narrowed by a free-text query over every column
+    and by exact column filters ({"Gender": "Male"}).
+    """
+    df, search = frame_cache.get(xlsx_path)
+    mask = pd.Series(True, index=df.index)
+    if q:
+        mask &= search.str.contains(q.lower(), regex=False)
+    for column, value in (filters or {}).items():
+        if column in df.columns and value:
+            mask &= df[column] == value
+    matched = df[mask]
+
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    pages = max(1, -(-len(matched) // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return {
+        "total": len(df),
+        "matched": len(matched),
+        "page": page,
+        "page_size": page_size,
+        "pages": pages,
+        "records": matched.iloc[start:start + page_size].to_dict(orient="records"),
+    }
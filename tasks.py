@@ -0,0 +1,288 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# --- Custom OCR & Parser Modules ---
+from ocr.voter_ocr import (
+    extract_voter_boxes, split_voter_box, ocr_page_boxes,
+    pdf_page_count, render_pdf_page, page_array,
+)
+from ocr.layout import VoterLayout
+from ocr.grid_template import GridTemplate
+from ocr.page_classifier import classify_page
+from ocr.executor import get_ocr_executor
+from ocr.backends import get_backend
+from parsers.voterP import parse_voter_text, extract_epic
+from ocr.voterid_ocr import OCRProcessor, CARD_PREPROCESS, CARD_LANG_MODE
+from ocr.card_batch import ocr_cards, get_card_executor
+from parsers.voteridP import VoterParser
+from jobs import job_store
+from result_cache import result_cache
+from exporters import ResultWriter
+from results import write_part, remove_parts
+
+# "box" OCRs each crop on its own, "page" OCRs the whole page once (see ocr_page_boxes)
+OCR_MODE = os.getenv("OCR_MODE", "box")
+# OCR crops are cut from an OCR_DPI render; the grid can be found on a cheaper DETECT_DPI render
+OCR_DPI = int(os.getenv("OCR_DPI", 200))
+DETECT_DPI = int(os.getenv("DETECT_DPI", OCR_DPI))
+# "fast" rasterizes straight to grayscale and finds the grid at half resolution
+GRID_MODE = os.getenv("GRID_MODE", "full")
+GRID_SCALE = 0.5 if GRID_MODE == "fast" else 1.0
+# Learn the grid from the first pages of a roll and reuse it on pages that still match
+GRID_TEMPLATE = os.getenv("GRID_TEMPLATE", "0") == "1"
+# Pages are first judged on a CLASSIFY_DPI thumbnail; blank and gridless ones are never fully rendered
+PAGE_CLASSIFIER = os.getenv("PAGE_CLASSIFIER", "1") == "1"
+CLASSIFY_DPI = int(os.getenv("CLASSIFY_DPI", 40))
+# Seconds between liveness pings while a job runs; stale jobs are re-queued by workers
+HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+
+# VoterParser is stateless and shared; OCRProcessor keeps timing counters, so every
+# embedded worker thread gets its own
+CARD_PARSER = VoterParser()
+_card_local = threading.local()
+
+
+def card_ocr():
+    processor = getattr(_card_local, "processor", None)
+    if processor is None:
+        processor = _card_local.processor = OCRProcessor()
+    return processor
+
+
+def ocr_config_key():
+    """Everything about the OCR setup that changes the text coming out of it."""
+    return f"mode={OCR_MODE};backend={get_backend().name};dpi={OCR_DPI};detect_dpi={DETECT_DPI};grid={GRID_MODE};template={GRID_TEMPLATE};classify={PAGE_CLASSIFIER and CLASSIFY_DPI};card={CARD_PREPROCESS};card_lang={CARD_LANG_MODE}"
+
+
+def detect_page(file_path, pg_no, template=None):
+    """Boxes of one page in OCR_DPI pixels and the OCR_DPI image to crop them from."""
+    grayscale = GRID_MODE == "fast"
+    page = render_pdf_page(file_path, pg_no, dpi=DETECT_DPI, grayscale=grayscale)
+    if page is None:
+        return [], None
+    if template is not None:
+        boxes, img = template.detect(page)
+    else:
+        boxes, img = extract_voter_boxes(page, scale=GRID_SCALE, dpi=DETECT_DPI)
+    if boxes and DETECT_DPI != OCR_DPI:
+        # Only pages that actually hold voter boxes pay for the high-resolution render
+        boxes = VoterLayout(DETECT_DPI).scale_boxes(boxes, OCR_DPI)
+        img = page_array(render_pdf_page(file_path, pg_no, dpi=OCR_DPI, grayscale=grayscale))
+    return boxes, img
+
+
+def skip_reason(file_path, pg_no):
+    """Why a page can be skipped without OCR ("blank", "no_grid"), or None to process it."""
+    if not PAGE_CLASSIFIER:
+        return None
+    thumb = render_pdf_page(file_path, pg_no, dpi=CLASSIFY_DPI, grayscale=True)
+    if thumb is None:
+        return "blank"
+    kind = classify_page(thumb, dpi=CLASSIFY_DPI)
+    return None if kind == "voter" else kind
+
+
+def raw_text_path(file_id, directory):
+    """Gzipped JSONL sidecar holding the raw OCR text of every box, for re-parsing."""
+    return os.path.join(directory, f"{file_id}.raw.jsonl.gz")
+
+
+def parse_raw_row(doc_type, row):
+    """Turns one stored OCR row back into a record; the only step a reparse repeats."""
+    if doc_type == "voter_list":
+        data = parse_voter_text(row["left"])
+        data.update({"EPIC No": extract_epic(row["right"]), "Page No": row["page"]})
+        return data
+    data = CARD_PARSER.parse_all(row["text"])
+    if doc_type == "voter_id_batch":
+        data["Source"] = row["card"]
+    return data
+
+
+def read_raw_rows(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def trim_raw_rows(path, upto_page):
+    """
+    Keeps only the rows of pages up to upto_page, for resuming a job that died
+    mid-roll. The sidecar of a crashed run may end in a truncated gzip stream.
+    """
+    rows = []
+    try:
+        for row in read_raw_rows(path):
+            if row["page"] <= upto_page:
+                rows.append(row)
+    except (EOFError, OSError, ValueError):
+        pass  # truncated tail from the crash
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def records_frame(doc_type, rows):
+    """
+    All stored OCR rows of a document as one frame. Goes through parse_raw_row,
+    the same path as the live job, so a reparse of unchanged text gives the same records.
+    """
+    return pd.DataFrame([parse_raw_row(doc_type, row) for row in rows])
+
+
+def finish_job(file_id, output_path, count, doc_type, cache_key=None):
+    if cache_key and count:
+        result_cache.store(cache_key, output_path, count,
+                           raw_path=raw_text_path(file_id, os.path.dirname(output_path)))
+
+    # Update status to Completed for the UI to pick up
+    job_store.update(
+        file_id,
+        state="done",
+        status="Completed",
+        file=output_path,
+        count=count,
+        doc_type=doc_type,
+        timestamp=datetime.now(),
+    )
+
+
+def write_results(file_id, output_path, records, doc_type, cache_key=None):
+    """records is a list of dicts or an already built DataFrame."""
+    writer = ResultWriter(output_path)
+    writer.append(records)
+    finish_job(file_id, output_path, writer.close(), doc_type, cache_key)
+
+
+def process_page(file_path, pg_no, doc_type, template, executor, raw, writer, output_path):
+    """OCRs one roll page and publishes its records to the workbook and the page parts."""
+    boxes, img = detect_page(file_path, pg_no, template)
+    if not boxes:
+        return
+    if OCR_MODE == "page":
+        # One image_to_data call for the page, words mapped back to boxes
+        box_texts = ocr_page_boxes(img, boxes)
+    else:
+        # Left/right crops of every box go out together; texts come back in box order
+        crops = []
+        for x, y, w, h in boxes:
+            crops.extend(split_voter_box(img, x, y, w, h))
+        texts = executor.map(crops)
+        box_texts = list(zip(texts[0::2], texts[1::2]))
+    page_records = []
+    for box, (left_text, right_text) in zip(boxes, box_texts):
+        row = {"page": pg_no, "box": list(box), "left": left_text, "right": right_text}
+        raw.write(json.dumps(row, ensure_ascii=False) + "\n")
+        page_records.append(parse_raw_row(doc_type, row))
+    # Sync-flushed so a crash after this page can still read its raw rows back
+    raw.flush()
+    writer.append(page_records)
+    # Readable through /results while the rest of the roll is still running
+    write_part(output_path, pg_no, page_records)
+
+
+def process_pdf_task(file_id: str, file_path: str, doc_type: str, cache_key: str = None):
+    writer = output_path = None
+    try:
+        directory = os.path.dirname(file_path)
+        output_path = os.path.join(directory, f"{file_id}.xlsx")
+        raw_path = raw_text_path(file_id, directory)
+        # Records go to the workbook page by page instead of piling up until the end
+        writer = ResultWriter(output_path)
+        job = job_store.get(file_id) or {}
+        # A job re-queued after a crash picks up after its last finished page
+        resume_after = job.get("pages_done", 0) if doc_type == "voter_list" and os.path.exists(raw_path) else 0
+        if resume_after:
+            # Finished pages are parsed again from their raw text: the Parquet parts hold
+            # display strings, not the typed records the workbook is written from
+            trim_raw_rows(raw_path, resume_after)
+            writer.append([parse_raw_row(doc_type, row) for row in read_raw_rows(raw_path)])
+        else:
+            remove_parts(output_path)  # left over from an earlier, abandoned run
+        with gzip.open(raw_path, "at" if resume_after else "wt", encoding="utf-8") as raw:
+            if doc_type == "voter_list":
+                executor = get_ocr_executor()
+                template = GridTemplate(dpi=DETECT_DPI, scale=GRID_SCALE) if GRID_TEMPLATE else None
+                page_count = pdf_page_count(file_path)
+                skipped = {"blank": job.get("pages_skipped_blank", 0) if resume_after else 0,
+                           "no_grid": job.get("pages_skipped_no_grid", 0) if resume_after else 0}
+                run_start = time.monotonic()
+                for pg_no in range(resume_after + 1, page_count + 1):
+                    reason = skip_reason(file_path, pg_no)
+                    if reason:
+                        skipped[reason] += 1
+                    else:
+                        process_page(file_path, pg_no, doc_type, template, executor, raw, writer, output_path)
+                    # Published after the page's records, so pages_done never runs ahead of the parts
+                    eta = (time.monotonic() - run_start) / (pg_no - resume_after) * (page_count - pg_no)
+                    job_store.update(
+                        file_id,
+                        pages_total=page_count,
+                        pages_done=pg_no,
+                        count=writer.count,
+                        eta_seconds=int(eta),
+                        pages_skipped_blank=skipped["blank"],
+                        pages_skipped_no_grid=skipped["no_grid"],
+                    )
+
+            elif doc_type == "voter_id_card":
+                row = {"page": 1, "text": card_ocr().get_text(file_path)}
+                raw.write(json.dumps(row, ensure_ascii=False) + "\n")
+                writer.append([parse_raw_row(doc_type, row)])
+
+            elif doc_type == "voter_id_batch":
+                # ZIP or multi-page PDF of cards, fanned out over the card pool; one row per card
+                for no, (source, text) in enumerate(ocr_cards(file_path, get_card_executor()), start=1):
+                    row = {"page": no, "card": source, "text": text}
+                    raw.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    writer.append([parse_raw_row(doc_type, row)])
+
+        # Workbook next to the upload is complete once the writer closes
+        finish_job(file_id, output_path, writer.close(), doc_type, cache_key)
+        remove_parts(output_path)
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        if output_path is not None:
+            remove_parts(output_path)
+        job_store.update(file_id, state="failed", status=f"Error: {str(e)}", file=None, count=0, timestamp=datetime.now())
+
+
+def reparse_task(file_id: str, raw_path: str, doc_type: str):
+    """Rebuilds records from a stored raw-text sidecar with the current parsers; no OCR."""
+    try:
+        records = records_frame(doc_type, read_raw_rows(raw_path))
+        output_path = os.path.join(os.path.dirname(raw_path), f"{file_id}.xlsx")
+        write_results(file_id, output_path, records, doc_type)
+    except Exception as e:
+        job_store.update(file_id, state="failed", status=f"Error: {str(e)}", file=None, count=0, timestamp=datetime.now())
+
+
+def run_job(job):
+    """Runs a claimed job while a side thread keeps its heartbeat fresh."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                job_store.heartbeat(job["file_id"])
+            except sqlite3.Error:
+                pass  # database briefly locked; the next beat tries again
+
+    threading.Thread(target=beat, daemon=True).start()
+    try:
+        if job.get("job_type") == "reparse":
+            reparse_task(job["file_id"], job["file_path"], job["doc_type"])
+        else:
+            process_pdf_task(job["file_id"], job["file_path"], job["doc_type"], job.get("cache_key"))
+    finally:
+        stop.set()
@@ -0,0 +1,57 @@
+"""
+Job worker: claims queued OCR jobs from the shared job store and runs them.
+
+Run one or more of these next to the web app (`python worker.py`) and set
+EMBEDDED_WORKERS=0 on the web processes so OCR capacity scales on its own.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import datetime
+
+from jobs import job_store
+from tasks import run_job
+
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+# A running job whose heartbeat is older than this is considered abandoned
+STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+
+log = logging.getLogger("worker")
+
+
+def work_forever(name=None, stop=None):
+    name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        # Nothing may end this loop: in the web process it is the whole queue
+        job = None
+        try:
+            job_store.requeue_stale(STALE_SECONDS)
+            job = job_store.claim(name)
+            if job is None:
+                stop.wait(POLL_SECONDS)
+                continue
+            run_job(job)
+        except Exception as e:
+            log.exception("worker %s: %s", name, f"job {job['file_id']} crashed" if job else "queue error")
+            if job is not None:
+                try:
+                    job_store.update(job["file_id"], state="failed", status=f"Error: {e}", file=None, count=0,
+                                     timestamp=datetime.now())
+                except Exception:
+                    log.exception("worker %s: could not mark job %s failed", name, job["file_id"])
+            stop.wait(POLL_SECONDS)
+
+
+def start_embedded_workers(count):
+    """Worker threads inside the web process, for single-container deployments."""
+    stop = threading.Event()
+    for _ in range(count):
+        threading.Thread(target=work_forever, kwargs={"stop": stop}, daemon=True).start()
+    return stop
+
+
+if __name__ == "__main__":
+    print(f"worker {os.getpid()} polling {job_store.path}")
+    work_forever()